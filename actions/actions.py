@@ -1,95 +1,49 @@
-import json
-import numpy as np
-from sentence_transformers import SentenceTransformer
-from rapidfuzz import fuzz
-from scipy.spatial.distance import cosine
-from typing import Any, Text, Dict, List
+import time
+from typing import Any, Dict, List, Text
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
 
-# Загружаем данные из JSON-файла
-def load_questions_data(file_path: str):
-    with open(file_path, "r", encoding="utf-8") as file:
-        data = json.load(file)
-    return data
-
-# Загружаем все вопросы из JSON
-QA_DATABASE = load_questions_data('scripts/questions.json')
-
-# Инициализация модели для sentence-transformers
-model = SentenceTransformer('all-MiniLM-L6-v2')
-
-# Функция для нахождения наиболее похожего вопроса с использованием sentence-transformers
-def find_similar_question_semantic(user_question: str):
-    # Преобразуем пользовательский вопрос в вектор (убираем лишнюю ось)
-    user_question_embedding = model.encode([user_question]).squeeze()
-
-    similarities = []
-    for qa in QA_DATABASE:
-        question_embedding = model.encode([qa["question"]]).squeeze()
-        similarity = 1 - cosine(user_question_embedding, question_embedding)  # Преобразуем в меру схожести
-        similarities.append((qa, similarity))
-
-    similarities.sort(key=lambda x: x[1], reverse=True)  # Чем выше, тем лучше
-    return similarities[0]  # Возвращаем кортеж (qa, similarity)
-
-def find_similar_option_semantic(correct_options: List[str], user_options: List[str]):
-    result = []
-
-    for uqa in user_options:
-        similarities = []
-        for cqa in correct_options:
-            similarity = 1 - cosine(model.encode([uqa]).squeeze(), model.encode([cqa]).squeeze())
-            similarities.append((cqa, uqa, similarity))
-        similarities.sort(key=lambda x: x[2], reverse=True)  # Чем выше, тем лучше
-        result.append(similarities[0])
-
-    return result
-
-# Функция для нахождения наиболее похожего вопроса с использованием RapidFuzz
-def find_similar_question_fuzz(user_question: str):
-    similarities = []
-    for qa in QA_DATABASE:
-        similarity = fuzz.ratio(user_question.lower(), qa["question"].lower()) / 100.0  # Нормируем к 0-1
-        similarities.append((qa, similarity))
-
-    similarities.sort(key=lambda x: x[1], reverse=True)  # Чем выше, тем лучше
-    return similarities[0]  # Возвращаем кортеж (qa, similarity)
+from actions.metrics import SCORE_BUCKETS
+# Банк, индексы, кэши и стратегия поиска — общие для всех действий (actions.retrieval)
+from actions.retrieval.engine import (
+    METRICS,
+    find_similar_option_async,
+    match_question_async,
+    match_questions_batch_async,
+    record_answer,
+)
+from scripts.quiz import parse_questions_text
 
 class ActionAnswerQuestion(Action):
     def name(self) -> Text:
         return "action_answer_question"
 
-    def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    async def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+        started = time.perf_counter()
         user_question = tracker.latest_message.get("text")
         type_ans = ["action_answer_question"]
 
-        # Используем оба подхода
-        semantic_match, semantic_score = find_similar_question_semantic(user_question)
-        fuzz_match, fuzz_score = find_similar_question_fuzz(user_question)
+        # Поиск стратегией settings.STRATEGY (по умолчанию hybrid, см. раздел retrieval: в endpoints.yml)
+        bank, match = await match_question_async(user_question)
+        type_ans.append(match.method)
 
-        # Определяем лучший метод
-        if fuzz_score >= semantic_score:
-            type_ans.append("fuzz")
-            qa = fuzz_match
-        else:
-            type_ans.append("semantic")
-            qa = semantic_match
+        with METRICS.span("format"):
+            # Текст ответа собран заранее (actions.response_artifacts), остаётся дописать тип ответа
+            message = bank.responses().question_message(match.index)
 
-        correct_answer = qa["answers"]
-        explanation = qa.get("explanation", "Explanation not found.")
+            msg_type = ", ".join(type_ans)
 
-        msg_type = ", ".join(type_ans)
-
-        dispatcher.utter_message(f"{msg_type} \n\n\nCorrect answer: ✅ {correct_answer}\n\n\n Explanation: {explanation}")
+            dispatcher.utter_message(msg_type + message)
 
+        record_answer("action_answer_question", match.method, match.score, started)
         return []
 
 class ActionAnswerMultipleChoice(Action):
     def name(self) -> Text:
         return "action_answer_multiple_choice"
 
-    def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    async def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+        started = time.perf_counter()
         type_ans = ["action_answer_multiple_choice"]
 
         user_message = tracker.latest_message.get("text")
@@ -105,38 +59,58 @@ class ActionAnswerMultipleChoice(Action):
             dispatcher.utter_message("Invalid question.")
             return []
 
-        # Используем оба подхода
-        semantic_match, semantic_score = find_similar_question_semantic(user_question)
-        fuzz_match, fuzz_score = find_similar_question_fuzz(user_question)
-
-        # Определяем лучший метод
-        if fuzz_score >= semantic_score:
-            type_ans.append("fuzz")
-            qa = fuzz_match
-        else:
-            type_ans.append("semantic")
-            qa = semantic_match
+        # Поиск стратегией settings.STRATEGY (по умолчанию hybrid, см. раздел retrieval: в endpoints.yml)
+        bank, match = await match_question_async(user_question)
+        type_ans.append(match.method)
 
-        correct_options = []
         user_options = [s for s in user_options if s.strip()]
 
-        for idx in qa["answer"]:
-            correct_options.append(qa["options"][idx])
+        # Правильные варианты и строки их эмбеддингов — из готового ответа, кодируются только варианты пользователя
+        responses = bank.responses()
+        response = responses.get(match.index)
+        correct_options_with_score = await find_similar_option_async(
+            list(response.correct_options), user_options, response.option_rows, bank
+        )
+
+        with METRICS.span("format"):
+            score_options_show = []
 
-        correct_options_with_score = find_similar_option_semantic(correct_options, user_options)
+            for cows in correct_options_with_score:
+                score_options_show.append(f"{cows[1]} score:{round(cows[2]*100,2)}%")
 
-        score_options_show = []
+            score_options_show = "\n ".join(score_options_show)
 
-        for cows in correct_options_with_score:
-            score_options_show.append(f"{cows[1]} score:{round(cows[2]*100,2)}%")
+            msg_type = ", ".join(type_ans)
 
-        score_options_show = "\n ".join(score_options_show)
+            dispatcher.utter_message(f"{msg_type}\n\n score:\n {score_options_show}" + responses.choice_message(match.index))
+
+        record_answer("action_answer_multiple_choice", match.method, match.score, started)
+        return []
 
-        correct_answer = qa["answers"]
-        explanation = qa.get("explanation", "Explanation not found.")
+class ActionAnswerBatch(Action):
+    def name(self) -> Text:
+        return "action_answer_batch"
+
+    async def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+        started = time.perf_counter()
+
+        # Экзамен, вставленный целиком: блоки "Question N: ..." в формате scripts/quiz.py
+        questions = parse_questions_text(tracker.latest_message.get("text") or "")
+        if not questions:
+            dispatcher.utter_message("No questions found. Paste them as \"Question 1: ...\", \"Question 2: ...\".")
+            return []
 
-        msg_type = ", ".join(type_ans)
+        # Один батч модели на все вопросы; ответы — сообщениями по порядку вопросов
+        bank, found = await match_questions_batch_async([q["question"] for q in questions])
+        found.sort(key=lambda item: item[0])
 
-        dispatcher.utter_message(f"{msg_type}\n\n score:\n {score_options_show} \n\n\n Correct answer:✅ {correct_answer} \n\n Explanation: {explanation}")
+        with METRICS.span("format"):
+            responses = bank.responses()
+            for position, match in found:
+                dispatcher.utter_message(f"Question {position + 1}: {match.method}, score:{round(match.score*100,2)}%"
+                                         + responses.question_message(match.index))
+                METRICS.inc("answers_total", action="action_answer_batch", method=match.method)
+                METRICS.observe("match_score", match.score, SCORE_BUCKETS, action="action_answer_batch", method=match.method)
 
+        METRICS.observe("action_seconds", time.perf_counter() - started, action="action_answer_batch")
         return []
@@ -0,0 +1,86 @@
+import logging
+import os
+import threading
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class BankManager:
+    """
+    Текущий снимок банка вопросов с подменой при изменении файла.
+
+    `load(path, previous)` строит новый неизменяемый снимок (данные и индексы),
+    используя прошлый снимок для переиспользования готовых эмбеддингов.
+    Запрос берёт `manager.current` один раз и работает с этим снимком до конца;
+    новый снимок собирается в фоновом потоке и подменяет ссылку одним
+    присваиванием, поэтому запросы в работе не блокируются и не видят
+    наполовину обновлённых индексов.
+    """
+
+    def __init__(self, path: str, load: Callable[[str, Optional[Any]], Any], interval: float = 2.0):
+        self.path = path
+        self.interval = interval
+        self._load = load
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[Any, Any], None]] = []
+        self.reloads = 0
+        self.errors = 0
+        self._stamp = self._file_stamp()
+        self.current = load(path, None)
+
+    def _file_stamp(self) -> Tuple[int, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def on_swap(self, callback: Callable[[Any, Any], None]):
+        # callback(new, previous) вызывается в потоке перезагрузки сразу после подмены снимка
+        self._listeners.append(callback)
+
+    def reload(self, force: bool = False) -> bool:
+        """Пересобирает снимок, если файл изменился; True, если снимок подменён."""
+        with self._lock:
+            try:
+                stamp = self._file_stamp()
+            except OSError:
+                return False  # Файл подменяется прямо сейчас — проверим на следующем шаге
+            if stamp == self._stamp and not force:
+                return False
+
+            try:
+                snapshot = self._load(self.path, self.current)
+            except Exception:
+                # Битый или недописанный файл: остаёмся на прошлом снимке до следующего изменения
+                self.errors += 1
+                self._stamp = stamp
+                logger.exception("Failed to reload question bank %s, keeping the previous one", self.path)
+                return False
+
+            self._stamp = stamp
+            previous, self.current = self.current, snapshot
+            self.reloads += 1
+            for callback in self._listeners:
+                callback(snapshot, previous)
+            logger.info("Reloaded question bank %s", self.path)
+            return True
+
+    def start(self) -> Optional[threading.Thread]:
+        # Опрос mtime раз в interval секунд; 0 — без слежения, только ручной reload()
+        if self.interval <= 0 or self._thread is not None:
+            return self._thread
+
+        def watch():
+            while not self._stop.wait(self.interval):
+                self.reload()
+
+        self._thread = threading.Thread(target=watch, name="bank-reload", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> dict:
+        return {"reloads": self.reloads, "errors": self.errors}
@@ -0,0 +1,49 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer a whole pasted exam (\"Question N: ...\" blocks, as in scripts/quiz.py) in one batch")
+    parser.add_argument("path", nargs="?", default="-", help="exam text file, - for stdin")
+    parser.add_argument("--explain", action="store_true", help="print the explanation as well")
+    parser.add_argument("--jsonl", action="store_true", help="one JSON object per answer, in the order they are ready")
+    args = parser.parse_args()
+
+    # Одна пачка и выход: модель грузится сразу, банк не отслеживается
+    os.environ.setdefault("QUIZ_MODEL_WARMUP", "0")
+    os.environ.setdefault("QUIZ_BANK_RELOAD_INTERVAL", "0")
+    from actions.retrieval import engine
+    from scripts.quiz import parse_questions_text
+
+    if args.path == "-":
+        content = sys.stdin.read()
+    else:
+        with open(args.path, "r", encoding="utf-8") as f:
+            content = f.read()
+    questions = parse_questions_text(content)
+    if not questions:
+        print("No questions found", file=sys.stderr)
+        sys.exit(1)
+
+    # Ответы печатаются по мере готовности: найденные без модели — сразу, остальные — после одного батча
+    started = time.perf_counter()
+    for position, qa, score, method in engine.find_similar_questions_batch([q["question"] for q in questions]):
+        if args.jsonl:
+            print(json.dumps({"question": position + 1, "match": qa["question"], "score": score, "method": method,
+                              "answers": qa["answers"]}, ensure_ascii=False), flush=True)
+            continue
+        print(f"Question {position + 1}: {method}, score:{round(score * 100, 2)}%")
+        print(f"  {qa['question']}")
+        print(f"  Correct answer: ✅ {qa['answers']}")
+        if args.explain:
+            print(f"  Explanation: {qa.get('explanation', 'Explanation not found.')}")
+        print(flush=True)
+    print(f"{len(questions)} questions in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
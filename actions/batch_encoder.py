@@ -0,0 +1,87 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+from actions.embedding_index import encode_normalized
+
+
+class BatchEncoder:
+    """
+    Склеивает одновременные запросы на кодирование в один батч модели.
+
+    Фоновый поток берёт первый запрос из очереди, ждёт ещё до `max_wait`
+    секунд (или пока не наберётся `max_batch`) и кодирует всё одним вызовом.
+    При max_wait=0 окно не ждёт: в батч попадает всё, что накопилось, пока
+    модель считала предыдущий, — под нагрузкой батчи растут сами, а
+    одиночный запрос не получает лишней задержки.
+
+    Асинхронные действия ждут результат через `encode_async` в event loop,
+    не занимая поток пула: иначе в батч попадает не больше запросов, чем
+    потоков в InferencePool.
+    """
+
+    def __init__(self, get_model: Callable, max_wait: float = 0.0, max_batch: int = 64):
+        self.get_model = get_model
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, text: str) -> Future:
+        future: Future = Future()
+        self._ensure_worker()
+        self._queue.put((text, future))
+        return future
+
+    def encode(self, text: str) -> np.ndarray:
+        return self.submit(text).result()
+
+    async def encode_async(self, text: str) -> np.ndarray:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="batch-encoder", daemon=True)
+                    self._thread.start()
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                remaining = deadline - time.monotonic()
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            # Запросы, чьё ожидание уже отменено (таймаут действия), не кодируем
+            batch = [(text, future) for text, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                vectors = encode_normalized(self.get_model(), [text for text, _ in batch])
+            except Exception as error:
+                for _, future in batch:
+                    future.set_exception(error)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+    def stats(self) -> dict:
+        return {"batches": self.batches, "items": self.items,
+                "mean_batch": self.items / self.batches if self.batches else 0.0}
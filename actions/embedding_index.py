@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# Хэш содержимого: меняется при изменении текстов банка или имени модели
+def content_hash(texts: Sequence[str], model_name: str) -> str:
+    digest = hashlib.sha256(model_name.encode("utf-8"))
+    for text in texts:
+        digest.update(b"\x00")
+        digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+# Пути к файлам индекса рядом с банком: scripts/questions.json -> scripts/questions.<name>.npy
+def index_paths(bank_path: str, name: str) -> Tuple[str, str]:
+    base, _ = os.path.splitext(bank_path)
+    return f"{base}.{name}.npy", f"{base}.{name}.meta.json"
+
+
+class EmbeddingIndex:
+    """Нормированные эмбеддинги текстов банка, сохранённые на диск как memmap-матрица."""
+
+    def __init__(self, embeddings: np.ndarray, digest: str, texts: Sequence[str] = ()):
+        self.embeddings = embeddings
+        self.digest = digest
+        self.texts = texts
+        # Текст -> строка матрицы, для выборки готовых эмбеддингов по тексту
+        self.rows = {text: row for row, text in enumerate(texts)}
+        # Необязательный бэкенд поиска (actions.vector_index); без него — точный проход по матрице
+        self.vectors = None
+        # Идентификаторы строк в vectors и обратно; None — идентификатор равен строке
+        self.vector_ids: Optional[List[int]] = None
+        self._vector_rows: Optional[Dict[int, int]] = None
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return self.embeddings.shape[0]
+
+    @classmethod
+    def load_or_build(cls, bank_path: str, name: str, texts: Sequence[str],
+                      get_model: Callable, model_name: str,
+                      previous: Optional["EmbeddingIndex"] = None) -> "EmbeddingIndex":
+        # get_model вызывается только при пересборке: актуальный индекс открывается без модели
+        matrix_path, meta_path = index_paths(bank_path, name)
+        digest = content_hash(texts, model_name)
+
+        # Индекс актуален — открываем матрицу без чтения в память
+        if os.path.exists(matrix_path) and os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as file:
+                meta = json.load(file)
+            if meta.get("digest") == digest:
+                return cls(np.load(matrix_path, mmap_mode="r"), digest, texts)
+
+        # При перезагрузке банка кодируются только тексты, которых не было в прошлом индексе
+        if previous is not None:
+            embeddings = previous.lookup(list(texts), get_model)
+        else:
+            embeddings = encode_normalized(get_model(), list(texts))
+        save_index(matrix_path, meta_path, embeddings, digest, model_name)
+        return cls(np.load(matrix_path, mmap_mode="r"), digest, texts)
+
+    def with_vector_index(self, vectors) -> "EmbeddingIndex":
+        # Строки матрицы становятся идентификаторами в индексе
+        vectors.add(list(range(len(self))), np.asarray(self.embeddings))
+        self.vectors = vectors
+        self._next_id = len(self)
+        return self
+
+    def carry_vector_index(self, previous: Optional["EmbeddingIndex"], make: Callable) -> "EmbeddingIndex":
+        """
+        Векторный индекс прошлого снимка банка с правкой только изменившихся строк.
+
+        Строка с тем же текстом сохраняет свой идентификатор (вставка вопроса
+        в середину банка не сдвигает остальные), новые тексты добавляются
+        под новыми идентификаторами, исчезнувшие удаляются. Правится копия
+        (VectorIndex.copy): прошлый снимок продолжает искать по своему
+        индексу до подмены. make() — новый пустой индекс: без прошлого
+        индекса или когда изменилось больше половины строк.
+        """
+        if previous is None or previous.vectors is None or previous.embeddings.shape[1] != self.embeddings.shape[1]:
+            return self.with_vector_index(make())
+
+        free: Dict[str, List[int]] = {}
+        previous_ids = previous.vector_ids if previous.vector_ids is not None else range(len(previous))
+        for text, vector_id in zip(previous.texts, previous_ids):
+            free.setdefault(text, []).append(vector_id)
+        ids: List[int] = []
+        added = []
+        for row, text in enumerate(self.texts):
+            reusable = free.get(text)
+            if reusable:
+                ids.append(reusable.pop(0))
+            else:
+                ids.append(-1)
+                added.append(row)
+        removed = [vector_id for rest in free.values() for vector_id in rest]
+        if len(added) + len(removed) > len(self) // 2:
+            # Правок слишком много: быстрее собрать заново, а ivf заодно получает свежие центроиды
+            return self.with_vector_index(make())
+
+        self._next_id = previous._next_id
+        for row in added:
+            ids[row] = self._next_id
+            self._next_id += 1
+        if added or removed:
+            vectors = previous.vectors.copy()
+            vectors.remove(removed)
+            if added:
+                vectors.add([ids[row] for row in added], np.asarray(self.embeddings[added]))
+        else:
+            vectors = previous.vectors  # Банк не изменился: индексы снимков не правятся, поэтому общий
+        self.vectors = vectors
+        if ids != list(range(len(ids))):
+            self.vector_ids = ids
+            self._vector_rows = {vector_id: row for row, vector_id in enumerate(ids)}
+        return self
+
+    def search(self, query_embedding: np.ndarray, k: int = 1) -> List[Tuple[int, float]]:
+        if self.vectors is not None:
+            found = self.vectors.search(query_embedding, k)
+            if self._vector_rows is None:
+                return found
+            return [(self._vector_rows[vector_id], score) for vector_id, score in found]
+        # Один матрично-векторный проход вместо цикла по банку
+        scores = self.embeddings @ query_embedding
+        return top_k(scores, k)
+
+    def scores(self, query_embedding: np.ndarray, indices: Sequence[int]) -> np.ndarray:
+        # Косинусная схожесть только с выбранными строками
+        return self.embeddings[np.asarray(indices, dtype=np.int64)] @ query_embedding
+
+    def scores_matrix(self, query_embeddings: np.ndarray) -> np.ndarray:
+        # Пачка запросов Q x банк одним матричным произведением (ответ на вставленный целиком экзамен)
+        return np.asarray(query_embeddings, dtype=np.float32) @ self.embeddings.T
+
+    def lookup(self, texts: List[str], get_model: Callable) -> np.ndarray:
+        # Готовые строки берём из индекса, отсутствующие тексты кодируем одним батчем
+        result = np.empty((len(texts), self.embeddings.shape[1]), dtype=np.float32)
+        missing = []
+        for i, text in enumerate(texts):
+            row = self.rows.get(text)
+            if row is None:
+                missing.append(i)
+            else:
+                result[i] = self.embeddings[row]
+        if missing:
+            result[missing] = encode_normalized(get_model(), [texts[i] for i in missing])
+        return result
+
+
+def encode_normalized(model, texts: List[str]) -> np.ndarray:
+    embeddings = model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+    return np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1)
+
+
+def save_index(matrix_path: str, meta_path: str, embeddings: np.ndarray, digest: str, model_name: str):
+    # Пишем во временные файлы и атомарно подменяем, чтобы параллельный старт не прочитал половину;
+    # у каждого процесса свои временные файлы, иначе два воркера пишут в один и тот же
+    tmp_matrix = f"{matrix_path}.{os.getpid()}.tmp.npy"
+    np.save(tmp_matrix, embeddings)
+    os.replace(tmp_matrix, matrix_path)
+
+    tmp_meta = f"{meta_path}.{os.getpid()}.tmp"
+    with open(tmp_meta, "w", encoding="utf-8") as file:
+        json.dump({"digest": digest, "model": model_name, "shape": list(embeddings.shape)}, file)
+    os.replace(tmp_meta, meta_path)
+
+
+# Top-k без полной сортировки: argpartition + сортировка только k элементов
+def top_k(scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return []
+    if k == 1:
+        idx = int(np.argmax(scores))
+        return [(idx, float(scores[idx]))]
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    candidates = candidates[np.argsort(-scores[candidates])]
+    return [(int(idx), float(scores[idx])) for idx in candidates]
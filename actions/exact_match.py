@@ -0,0 +1,48 @@
+import re
+from typing import Dict, Optional, Sequence
+
+
+# Те же правила, которыми scripts/questions-txt-to-json.py срезает "(choose ...)" у вопросов банка
+def strip_choose_suffix(text: str) -> str:
+    text = re.sub(r' \(choose.*', '', text.strip(), flags=re.IGNORECASE)
+    text = re.sub(r'\? Choose.*', '?', text, flags=re.IGNORECASE)
+    text = re.sub(r'\. Choose.*', '?', text, flags=re.IGNORECASE)
+    return text
+
+
+# Ключ для точного совпадения: без суффикса, регистра, пунктуации и пробелов
+def normalize_question(text: str) -> str:
+    return re.sub(r'[\W_]+', '', strip_choose_suffix(text).casefold())
+
+
+class ExactMatchIndex:
+    """Хэш-таблица нормализованный текст -> позиция в банке со счётчиками попаданий."""
+
+    def __init__(self, texts: Sequence[str]):
+        self.positions: Dict[str, int] = {}
+        for idx, text in enumerate(texts):
+            key = normalize_question(text)
+            if key:  # "?" и подобные записи нормализуются в "" — такой ключ совпал бы с любым "!!!" или эмодзи
+                self.positions.setdefault(key, idx)  # при дублях — первый, как и при сортировке
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, text: str) -> Optional[int]:
+        key = normalize_question(text)
+        return self.positions.get(key) if key else None
+
+    def lookup(self, text: str) -> Optional[int]:
+        idx = self._get(text)
+        if idx is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return idx
+
+    def position(self, text: str) -> Optional[int]:
+        # Без счётчиков: для сопоставления уже найденного текста (например, ответа сервиса поиска)
+        return self._get(text)
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
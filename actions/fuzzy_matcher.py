@@ -0,0 +1,77 @@
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from actions.embedding_index import top_k
+
+
+class FuzzyMatcher:
+    """
+    Нечёткий поиск по корпусу вопросов на rapidfuzz.
+
+    Корпус нормализуется один раз при создании; одиночный запрос идёт через
+    process.extract (top-k и score_cutoff в C++), пачка запросов — через
+    process.cdist с распараллеливанием по workers. Оценки нормированы к 0-1.
+    """
+
+    def __init__(self, texts: Sequence[str], scorer=fuzz.ratio,
+                 processor: Optional[Callable[[str], str]] = str.lower, workers: int = -1):
+        self.scorer = scorer
+        self.processor = processor
+        self.workers = workers
+        self.choices = [self._normalize(text) for text in texts]
+
+    def __len__(self) -> int:
+        return len(self.choices)
+
+    def _normalize(self, text: str) -> str:
+        return self.processor(text) if self.processor else text
+
+    def extract(self, query: str, k: int = 1, score_cutoff: float = 0.0) -> List[Tuple[int, float]]:
+        # Возвращает [(индекс в корпусе, схожесть)], лучшие первыми; пусто, если никто не прошёл порог
+        matches = process.extract(
+            self._normalize(query), self.choices,
+            scorer=self.scorer, processor=None, limit=k, score_cutoff=score_cutoff * 100,
+        )
+        return [(idx, score / 100.0) for _, score, idx in matches]
+
+    def scores(self, query: str, indices: Sequence[int]) -> np.ndarray:
+        # Оценки только для выбранных кандидатов (второй этап гибридного поиска)
+        choices = [self.choices[idx] for idx in indices]
+        return process.cdist([self._normalize(query)], choices, scorer=self.scorer, processor=None, workers=1)[0] / 100.0
+
+    def extract_batch(self, queries: Sequence[str], k: int = 1, score_cutoff: float = 0.0) -> List[List[Tuple[int, float]]]:
+        # Матрица запросы x корпус считается в несколько потоков
+        scores = process.cdist(
+            [self._normalize(query) for query in queries], self.choices,
+            scorer=self.scorer, processor=None, score_cutoff=score_cutoff * 100, workers=self.workers,
+        )
+        result = []
+        for row in scores:
+            result.append([(idx, score / 100.0) for idx, score in top_k(row, k) if score >= score_cutoff * 100])
+        return result
+
+
+# Запасной (без модели) подбор правильного варианта для каждого варианта пользователя: (correct, user, score)
+def match_options_fuzz(correct_options: List[str], user_options: List[str]) -> List[Tuple[str, str, float]]:
+    if not correct_options or not user_options:
+        return []
+    scores = process.cdist([o.lower() for o in user_options], [o.lower() for o in correct_options],
+                           scorer=fuzz.ratio, processor=None)
+    best = scores.argmax(axis=1)
+    return [(correct_options[c], uqa, float(scores[row, c]) / 100.0)
+            for row, (uqa, c) in enumerate(zip(user_options, best))]
+
+
+# Матчер процесса-воркера для пула процессов: корпус передаётся один раз в initializer
+_worker_matcher: Optional[FuzzyMatcher] = None
+
+
+def init_worker(texts: Sequence[str]):
+    global _worker_matcher
+    _worker_matcher = FuzzyMatcher(texts)
+
+
+def worker_extract(query: str, k: int = 1) -> List[Tuple[int, float]]:
+    return _worker_matcher.extract(query, k=k)
@@ -0,0 +1,196 @@
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from actions.embedding_index import EmbeddingIndex
+from actions.exact_match import ExactMatchIndex
+from actions.fuzzy_matcher import FuzzyMatcher
+from actions.prefilter import NgramIndex
+
+FUSION_METHODS = ("rrf", "weighted", "max", "cascade")
+
+
+class Match(NamedTuple):
+    index: int     # позиция вопроса в банке
+    score: float   # уверенность в шкале 0-1
+    method: str    # чем найден: exact / fuzz / semantic / rerank / rrf / weighted
+
+
+class HybridRetriever:
+    """
+    Двухэтапный поиск вопроса.
+
+    Сначала проверяется точное совпадение нормализованного текста (без
+    инференса модели). Иначе префильтр по n-граммам (BM25) отбирает до `candidates` кандидатов, затем
+    только они оцениваются fuzzy- и semantic-скорером, а оценки объединяются
+    методом `fusion`. Стоимость запроса растёт с числом кандидатов, а не с размером банка.
+
+    fusion="cascade" — каскад с ранним выходом: exact, затем fuzzy (без
+    инференса модели), затем semantic, затем кросс-энкодер по `rerank_top`
+    лучшим. Этап отвечает, если его лучшая оценка не ниже порога и отрыв от
+    второго кандидата не меньше `margin`; иначе — следующий этап. Если до
+    кросс-энкодера не дошло или его нет, ответ — по RRF, как при fusion="rrf".
+    """
+
+    def __init__(self, prefilter: NgramIndex, matcher: FuzzyMatcher, question_index: EmbeddingIndex,
+                 encode: Callable[[str], np.ndarray], fusion: str = "rrf", candidates: int = 50,
+                 rrf_k: int = 60, fuzz_weight: float = 0.5, exact: Optional[ExactMatchIndex] = None,
+                 span: Callable[[str], ContextManager] = lambda stage: nullcontext(),
+                 fuzz_threshold: float = 0.9, fuzz_margin: float = 0.1,
+                 semantic_threshold: float = 0.8, semantic_margin: float = 0.05,
+                 reranker: Optional[Callable[[str, List[int]], np.ndarray]] = None, rerank_top: int = 5):
+        if fusion not in FUSION_METHODS:
+            raise ValueError(f"Unknown fusion method {fusion!r}, expected one of {FUSION_METHODS}")
+        self.prefilter = prefilter
+        self.matcher = matcher
+        self.question_index = question_index
+        self.encode = encode
+        self.fusion = fusion
+        self.candidates_limit = candidates
+        self.rrf_k = rrf_k
+        self.fuzz_weight = fuzz_weight
+        self.exact = exact
+        # Замер этапов поиска (actions.metrics.Metrics.span); по умолчанию ничего не замеряется
+        self.span = span
+        # Пороги каскада; reranker(query, indices) -> оценки 0-1 для кандидатов (кросс-энкодер)
+        self.fuzz_threshold = fuzz_threshold
+        self.fuzz_margin = fuzz_margin
+        self.semantic_threshold = semantic_threshold
+        self.semantic_margin = semantic_margin
+        self.reranker = reranker
+        self.rerank_top = rerank_top
+
+    def candidates(self, query: str) -> List[Tuple[int, float]]:
+        # Пары (позиция в банке, оценка BM25); на маленьком банке это просто весь банк.
+        # Ни одной общей n-граммы — fuzzy и semantic оценивают весь банк (BM25 у всех 0)
+        pairs = self.prefilter.candidates(query, self.candidates_limit)
+        return pairs or [(idx, 0.0) for idx in range(self.prefilter.size)]
+
+    def search(self, query: str, k: int = 1) -> List[Match]:
+        matches, state = self.lexical(query, k)
+        if state is None:
+            return matches
+        return self.finish(query, state, self.encode(query), k)
+
+    def finish(self, query: str, state: Tuple, query_embedding: np.ndarray, k: int = 1) -> List[Match]:
+        # Этап с моделью: semantic-оценки кандидатов из state (результат lexical) и слияние
+        with self.span("semantic"):
+            semantic_scores = self.question_index.scores(query_embedding, state[0])
+        return self._rank(query, *state, semantic_scores, k)
+
+    def search_batch(self, queries: Sequence[str], encode_batch: Callable[[List[str]], np.ndarray],
+                     k: int = 1) -> Iterator[Tuple[int, List[Match]]]:
+        """
+        Пачка запросов: (позиция запроса, top-k) по мере готовности.
+
+        Найденное без модели (exact, уверенный fuzzy в каскаде) отдаётся
+        сразу; остальные запросы кодируются одним вызовом encode_batch, и
+        semantic-оценки всех считаются одним матричным произведением.
+        """
+        pending = []
+        for position, query in enumerate(queries):
+            matches, state = self.lexical(query, k)
+            if state is None:
+                yield position, matches
+            else:
+                pending.append((position, query, state))
+        if not pending:
+            return
+
+        query_embeddings = encode_batch([query for _, query, _ in pending])
+        with self.span("semantic"):
+            similarity = self.question_index.scores_matrix(query_embeddings)
+        for row, (position, query, state) in enumerate(pending):
+            yield position, self._rank(query, *state, similarity[row, state[0]], k)
+
+    def lexical(self, query: str, k: int = 1):
+        # Этапы без модели: ([Match], None), если ответ уже есть, иначе (None, (кандидаты, BM25, fuzzy))
+        if self.exact is not None and k == 1:
+            with self.span("exact"):
+                idx = self.exact.lookup(query)
+            if idx is not None:
+                return [Match(idx, 1.0, "exact")], None
+
+        with self.span("prefilter"):
+            pairs = self.candidates(query)
+        if not pairs:
+            return [], None
+        candidates = [idx for idx, _ in pairs]
+        lexical_scores = np.array([score for _, score in pairs], dtype=np.float32)
+
+        with self.span("fuzz"):
+            fuzz_scores = self.matcher.scores(query, candidates)
+        if self.fusion == "cascade":
+            confident = _confident(candidates, fuzz_scores, self.fuzz_threshold, self.fuzz_margin, "fuzz", k)
+            if confident:
+                return confident, None
+        return None, (candidates, lexical_scores, fuzz_scores)
+
+    def _rank(self, query, candidates, lexical_scores, fuzz_scores, semantic_scores, k) -> List[Match]:
+        if self.fusion == "cascade":
+            return self._cascade(query, candidates, lexical_scores, fuzz_scores, semantic_scores, k)
+
+        with self.span("fusion"):
+            if self.fusion == "max":
+                return self._fuse_max(candidates, fuzz_scores, semantic_scores, k)
+
+            if self.fusion == "weighted":
+                fused = self.fuzz_weight * fuzz_scores + (1 - self.fuzz_weight) * np.clip(semantic_scores, 0.0, 1.0)
+            else:
+                fused = self._rrf(lexical_scores, fuzz_scores, semantic_scores)
+
+            order = np.argsort(-fused, kind="stable")[:k]
+            return [Match(candidates[i], float(fused[i]), self.fusion) for i in order]
+
+    def _rrf(self, lexical_scores, fuzz_scores, semantic_scores) -> np.ndarray:
+        # Складываем обратные ранги BM25, fuzzy и semantic;
+        # нормируем так, что первое место у всех трёх = 1.0
+        return sum(1.0 / (self.rrf_k + 1 + _ranks(scores))
+                   for scores in (lexical_scores, fuzz_scores, semantic_scores)) * (self.rrf_k + 1) / 3
+
+    def _cascade(self, query, candidates, lexical_scores, fuzz_scores, semantic_scores, k) -> List[Match]:
+        confident = _confident(candidates, semantic_scores, self.semantic_threshold, self.semantic_margin,
+                               "semantic", k)
+        if confident:
+            return confident
+
+        with self.span("fusion"):
+            fused = self._rrf(lexical_scores, fuzz_scores, semantic_scores)
+            order = np.argsort(-fused, kind="stable")
+        if self.reranker is None:
+            return [Match(candidates[i], float(fused[i]), "rrf") for i in order[:k]]
+
+        # Кросс-энкодер — только по нескольким лучшим после RRF, одним батчем
+        top = [candidates[i] for i in order[:max(self.rerank_top, k)]]
+        with self.span("rerank"):
+            rerank_scores = np.asarray(self.reranker(query, top), dtype=np.float32)
+        reranked = np.argsort(-rerank_scores, kind="stable")[:k]
+        return [Match(top[i], float(rerank_scores[i]), "rerank") for i in reranked]
+
+    @staticmethod
+    def _fuse_max(candidates, fuzz_scores, semantic_scores, k) -> List[Match]:
+        # Прежнее поведение: сырые оценки сравниваются напрямую, при равенстве побеждает fuzz
+        matches = [Match(c, float(f), "fuzz") if f >= s else Match(c, float(s), "semantic")
+                   for c, f, s in zip(candidates, fuzz_scores, semantic_scores)]
+        matches.sort(key=lambda match: match.score, reverse=True)
+        return matches[:k]
+
+
+def _confident(candidates, scores, threshold, margin, method, k) -> List[Match]:
+    # Ответ этапа каскада, если лучший кандидат уверенно впереди; иначе пусто — решает следующий этап
+    if len(scores) == 0:
+        return []
+    order = np.argsort(-scores, kind="stable")[:max(k, 2)]
+    best = float(scores[order[0]])
+    runner_up = float(scores[order[1]]) if len(order) > 1 else 0.0
+    if best < threshold or best - runner_up < margin:
+        return []
+    return [Match(candidates[i], float(scores[i]), method) for i in order[:k]]
+
+
+def _ranks(scores: np.ndarray) -> np.ndarray:
+    # 0 — лучший кандидат
+    ranks = np.empty(len(scores), dtype=np.float32)
+    ranks[np.argsort(-scores, kind="stable")] = np.arange(len(scores))
+    return ranks
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional
+
+
+class PoolBusy(Exception):
+    """В пуле уже max_pending задач: запрос не ставится в очередь, а деградирует сразу."""
+
+
+class InferencePool:
+    """
+    Выполнение тяжёлых вызовов вне event loop action-сервера.
+
+    Кодирование и поиск (torch, NumPy отпускают GIL) идут в пул потоков,
+    чисто питоновский fuzzy-скоринг — в пул процессов, если он задан.
+    Число задач в работе ограничено (back-pressure), у ожидания есть таймаут.
+    """
+
+    def __init__(self, threads: int = 4, processes: int = 0, max_pending: int = 32, timeout: float = 2.0,
+                 process_initializer: Optional[Callable] = None, process_initargs: tuple = ()):
+        self.threads = threads
+        self.processes = processes
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._process_initializer = process_initializer
+        self._process_initargs = process_initargs
+        self._thread_pool: Optional[Executor] = None
+        self._process_pool: Optional[Executor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.timeouts = 0
+        self.rejected = 0
+
+    def _threads(self) -> Executor:
+        with self._lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(self.threads, thread_name_prefix="inference")
+            return self._thread_pool
+
+    def _fuzzy_executor(self) -> Executor:
+        if not self.processes:
+            return self._threads()
+        with self._lock:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(
+                    self.processes, initializer=self._process_initializer, initargs=self._process_initargs,
+                )
+            return self._process_pool
+
+    def reset_fuzzy(self, initargs: tuple):
+        # Новые данные для процессов fuzzy (перезагруженный банк): пул пересоздаётся при следующем вызове
+        with self._lock:
+            pool, self._process_pool = self._process_pool, None
+            self._process_initargs = initargs
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None) -> Any:
+        # Тяжёлый вызов в пуле потоков; PoolBusy при перегрузке, asyncio.TimeoutError по таймауту.
+        # timeout — остаток общего срока запроса, если вызов лишь один из его этапов; иначе self.timeout
+        return await self._submit(self._threads(), func, *args, timeout=timeout)
+
+    async def run_fuzzy(self, func: Callable, *args) -> Any:
+        # Fuzzy-скоринг — запасной путь, поэтому ему не мешают ни лимит, ни таймаут
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._fuzzy_executor(), func, *args)
+
+    async def wait(self, awaitable: Awaitable, timeout: Optional[float] = None) -> Any:
+        # Ожидание вне пула (например, батча BatchEncoder) с тем же учётом таймаутов в stats()
+        try:
+            return await asyncio.wait_for(awaitable, self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            self._timed_out()
+            raise
+
+    async def _submit(self, executor: Executor, func: Callable, *args, timeout: Optional[float] = None) -> Any:
+        timeout = self.timeout if timeout is None else timeout
+        if timeout <= 0:
+            # Срок запроса уже истёк на прошлых этапах: в пул не ставим
+            self._timed_out()
+            raise asyncio.TimeoutError()
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PoolBusy()
+            self._pending += 1
+
+        # Слот освобождается, когда задача реально завершилась в потоке, а не когда истёк таймаут
+        future = executor.submit(func, *args)
+        future.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self._timed_out()
+            raise
+
+    def _timed_out(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+
+    def stats(self) -> dict:
+        return {"pending": self._pending, "timeouts": self.timeouts, "rejected": self.rejected}
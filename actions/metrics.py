@@ -0,0 +1,196 @@
+import bisect
+import cProfile
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм: длительности в секундах и оценки совпадения 0-1
+SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SCORE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        position = bisect.bisect_left(self.buckets, value)
+        if position < len(self.counts):
+            self.counts[position] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    Счётчики и гистограммы горячего пути в формате Prometheus.
+
+    Все обновления — под одной блокировкой: действия работают и в event loop,
+    и в потоках пула. `collect` регистрирует функцию, чьи stats() (кэши,
+    точный поиск, пул) выводятся как gauge при каждом чтении /metrics.
+    """
+
+    def __init__(self, prefix: str = "quiz"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._buckets: Dict[str, Sequence[float]] = {}
+        self._collectors: List[Tuple[str, Callable[[], dict]]] = []
+
+    def inc(self, name: str, value: float = 1.0, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = SECONDS_BUCKETS, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            self._buckets.setdefault(name, buckets)
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self._buckets[name])
+            histogram.observe(value)
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        # Длительность этапа (encode, prefilter, semantic, ...) в гистограмму stage_seconds
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - start, stage=stage)
+
+    def collect(self, name: str, stats: Callable[[], dict]):
+        self._collectors.append((name, stats))
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {metric} counter")
+                lines.extend(f"{metric}{_labels(key)} {value:g}" for key, value in series.items())
+            for name, series in sorted(self._histograms.items()):
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for key, histogram in series.items():
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{metric}_bucket{_labels(key + (('le', f'{bound:g}'),))} {cumulative}")
+                    lines.append(f"{metric}_bucket{_labels(key + (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{metric}_sum{_labels(key)} {histogram.sum:g}")
+                    lines.append(f"{metric}_count{_labels(key)} {histogram.count}")
+
+        for name, stats in self._collectors:
+            for key, value in stats().items():
+                if isinstance(value, (int, float)):
+                    metric = f"{self.prefix}_{name}_{key}"
+                    lines.append(f"# TYPE {metric} gauge")
+                    lines.append(f"{metric} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(key: Labels) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in key) + "}"
+
+
+class Profiler:
+    """
+    Профилирование случайной доли запросов (`rate` от 0 до 1) через cProfile
+    или pyinstrument; профили пишутся в `directory`. Одновременно профилируется
+    не больше одного запроса: остальные в это время выполняются без профиля.
+    """
+
+    def __init__(self, rate: float = 0.0, directory: str = ".cache/profiles", backend: str = "cprofile"):
+        self.rate = rate
+        self.directory = directory
+        self.backend = backend
+        self._busy = threading.Lock()
+        self.sampled = 0
+
+    @contextmanager
+    def sample(self, name: str) -> Iterator[None]:
+        if self.rate <= 0 or random.random() >= self.rate or not self._busy.acquire(blocking=False):
+            yield
+            return
+        try:
+            profiler = self._start()
+            try:
+                yield
+            finally:
+                self._save(profiler, name)
+                self.sampled += 1
+        finally:
+            self._busy.release()
+
+    def _start(self):
+        if self.backend == "pyinstrument":
+            from pyinstrument import Profiler as SamplingProfiler
+
+            profiler = SamplingProfiler()
+        else:
+            profiler = cProfile.Profile()
+        profiler.start() if self.backend == "pyinstrument" else profiler.enable()
+        return profiler
+
+    def _save(self, profiler, name: str):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{name}-{time.time_ns()}")
+        if self.backend == "pyinstrument":
+            profiler.stop()
+            with open(f"{path}.html", "w", encoding="utf-8") as file:
+                file.write(profiler.output_html())
+        else:
+            profiler.disable()
+            profiler.dump_stats(f"{path}.prof")
+
+    def stats(self) -> dict:
+        return {"sampled": self.sampled}
+
+
+def serve(metrics: Metrics, port: int, host: str = "127.0.0.1") -> Optional[ThreadingHTTPServer]:
+    """GET /metrics на отдельном локальном порту рядом с action-сервером; None, если порт занят."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer((host, port), Handler)
+    except OSError as error:
+        # Несколько процессов action-сервера: порт получает только первый
+        logger.warning("Metrics endpoint not started on %s:%s: %s", host, port, error)
+        return None
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,79 @@
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+from actions import settings
+
+_models: Dict[Tuple[str, str], Any] = {}
+_lock = threading.Lock()
+
+
+def get_model(name: str = None, backend: str = None):
+    """Общая на процесс модель sentence-transformers; загружается при первом обращении."""
+    key = (name or settings.MODEL_NAME, backend or settings.MODEL_BACKEND)
+    model = _models.get(key)
+    if model is None:
+        with _lock:
+            model = _models.get(key)
+            if model is None:
+                model = _load(*key)
+                _models[key] = model
+    return model
+
+
+def _load(name: str, backend: str):
+    # torch и sentence_transformers импортируются только здесь: импорт модуля действий остаётся быстрым
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(name)
+    if backend == "onnx":
+        return SentenceTransformer(name, backend="onnx")
+    if backend == "onnx-int8":
+        # Квантизованная int8-модель для CPU из репозитория модели
+        return SentenceTransformer(name, backend="onnx", model_kwargs={"file_name": settings.ONNX_INT8_FILE})
+    raise ValueError(f"Unknown model backend {backend!r}, expected torch, onnx or onnx-int8")
+
+
+def get_cross_encoder(name: str):
+    """Общий на процесс кросс-энкодер (последний этап каскада); загружается при первом обращении."""
+    key = (name, "cross-encoder")
+    model = _models.get(key)
+    if model is None:
+        with _lock:
+            model = _models.get(key)
+            if model is None:
+                from sentence_transformers import CrossEncoder
+
+                model = CrossEncoder(name)
+                _models[key] = model
+    return model
+
+
+def lazy(factory: Callable[[], Any]) -> Callable[[], Any]:
+    """Оборачивает фабрику: объект создаётся один раз при первом вызове, потокобезопасно."""
+    lock = threading.Lock()
+    holder = []
+
+    def get():
+        nonlocal factory
+        if not holder:
+            with lock:
+                if not holder:
+                    holder.append(factory())
+                    factory = None  # Замыкание фабрики (например, прошлый снимок банка) больше не держим
+        return holder[0]
+
+    # Проверка без загрузки: при перезагрузке банка переиспользуется только уже загруженное
+    get.loaded = lambda: bool(holder)
+    return get
+
+
+def warm_up(*loaders: Callable[[], Any]) -> threading.Thread:
+    # Прогрев в фоне: сервер сразу принимает соединения, первый запрос ждёт только недогруженное
+    def run():
+        for loader in loaders:
+            loader()
+
+    thread = threading.Thread(target=run, name="model-warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,62 @@
+import re
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from actions.embedding_index import top_k
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(re.sub(r"[^\w]+", " ", text.lower()).split())
+
+
+def char_ngrams(text: str, n: int) -> List[str]:
+    padded = f" {normalize_text(text)} "
+    return [padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))]
+
+
+class NgramIndex:
+    """
+    Инвертированный индекс символьных n-грамм с оценкой BM25.
+
+    Дешёвый первый этап поиска: запрос трогает только списки своих n-грамм,
+    документная часть формулы BM25 посчитана заранее.
+    """
+
+    def __init__(self, texts: Sequence[str], n: int = 3, k1: float = 1.2, b: float = 0.75, max_df: float = 0.5):
+        self.n = n
+        self.size = len(texts)
+        self.max_df = max_df
+
+        doc_grams = [Counter(char_ngrams(text, n)) for text in texts]
+        lengths = np.array([sum(grams.values()) for grams in doc_grams], dtype=np.float32)
+        avg_length = float(lengths.mean()) if self.size else 1.0
+
+        raw: Dict[str, Tuple[List[int], List[int]]] = {}
+        for doc, grams in enumerate(doc_grams):
+            for gram, tf in grams.items():
+                docs, tfs = raw.setdefault(gram, ([], []))
+                docs.append(doc)
+                tfs.append(tf)
+
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for gram, (docs, tfs) in raw.items():
+            docs = np.array(docs, dtype=np.int32)
+            tfs = np.array(tfs, dtype=np.float32)
+            idf = np.log(1 + (self.size - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = k1 * (1 - b + b * lengths[docs] / avg_length)
+            self.postings[gram] = (docs, (idf * tfs * (k1 + 1) / (tfs + norm)).astype(np.float32))
+
+    def candidates(self, query: str, limit: int) -> List[Tuple[int, float]]:
+        postings = [self.postings[gram] for gram in set(char_ngrams(query, self.n)) if gram in self.postings]
+        # Слишком частые n-граммы почти ничего не различают, а стоят дороже всего
+        rare = [p for p in postings if len(p[0]) <= self.max_df * self.size]
+        postings = rare or postings
+
+        scores = np.zeros(self.size, dtype=np.float32)
+        for docs, weights in postings:
+            scores[docs] += weights
+        # Только документы хотя бы с одной общей n-граммой: нулевые оценки — не кандидаты, а случайные строки
+        hits = np.flatnonzero(scores > 0)
+        return [(int(hits[i]), score) for i, score in top_k(scores[hits], limit)]
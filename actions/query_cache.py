@@ -0,0 +1,191 @@
+import atexit
+import logging
+import os
+import pickle
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCache:
+    """
+    Ограниченный LRU-кэш с TTL для результатов по тексту запроса.
+
+    `namespace` входит в ключ (например, хэш банка или имя модели): после
+    смены банка старые записи просто перестают совпадать. Необязательный
+    второй уровень в sqlite переживает перезапуск `rasa run actions`.
+
+    На диск пишет фоновый поток: put только ставит запись в очередь, а
+    pickle, INSERT и commit идут пачкой раз в `flush_interval` секунд вне
+    блокировки кэша (WAL, synchronous=NORMAL). Запись, не успевшая попасть
+    на диск, теряется только при аварийном завершении процесса.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 3600.0,
+                 namespace: str = "", disk_path: Optional[str] = None, flush_interval: float = 0.5):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.namespace = namespace
+        self.flush_interval = flush_interval
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        self._db_lock = threading.Lock()  # соединение для чтения; у фонового потока записи своё
+        self._disk_path = disk_path
+        self._writes: "queue.Queue[Tuple[str, tuple]]" = queue.Queue()
+        self._writer = None
+        if disk_path:
+            os.makedirs(os.path.dirname(disk_path) or ".", exist_ok=True)
+            self._db = self._connect()
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache (name TEXT, namespace TEXT, key TEXT, value BLOB, expires REAL, "
+                "PRIMARY KEY (name, namespace, key))"
+            )
+            # Записи другого банка/модели и просроченные больше не понадобятся
+            self._db.execute("DELETE FROM cache WHERE name = ? AND (namespace != ? OR expires < ?)",
+                             (name, namespace, time.time()))
+            self._db.commit()
+            # Накопленное в очереди дописывается при обычном завершении процесса
+            atexit.register(self.flush)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self._disk_path, check_same_thread=False, timeout=5.0)
+        # WAL: чтение не ждёт записи; NORMAL: commit без fsync на каждую транзакцию
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def get(self, key: str, namespace: Optional[str] = None) -> Optional[Any]:
+        # namespace — для чего ищем (например, хэш снимка банка); устаревший запрос после смены банка промахивается
+        now = time.time()
+        with self._lock:
+            if namespace is not None and namespace != self.namespace:
+                self.misses += 1
+                return None
+            entry = self._data.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires >= now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            if self._db is None:
+                self.misses += 1
+                return None
+            current = self.namespace
+
+        # Чтение с диска и unpickle — вне блокировки кэша
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, expires FROM cache WHERE name = ? AND namespace = ? AND key = ?",
+                (self.name, current, key),
+            ).fetchone()
+        value = pickle.loads(row[0]) if row is not None and row[1] >= now else None
+
+        with self._lock:
+            if value is not None and current == self.namespace:
+                self._store(key, value, row[1])
+                self.disk_hits += 1
+                return value
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Any, namespace: Optional[str] = None):
+        expires = time.time() + self.ttl
+        with self._lock:
+            # Результат, посчитанный по прошлому банку, в кэш нового не попадает
+            if namespace is not None and namespace != self.namespace:
+                return
+            self._store(key, value, expires)
+            current = self.namespace
+        if self._db is not None:
+            self._enqueue("put", (self.name, current, key, value, expires))
+
+    def _enqueue(self, op: str, args: tuple):
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name=f"{self.name}-cache-writer",
+                                                    daemon=True)
+                    self._writer.start()
+        self._writes.put((op, args))
+
+    def _write_loop(self):
+        db = self._connect()
+        while True:
+            ops = [self._writes.get()]
+            # Пачка: всё, что накопилось за flush_interval, — одной транзакцией
+            time.sleep(self.flush_interval)
+            while True:
+                try:
+                    ops.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(db, ops)
+            except Exception:
+                # Любая ошибка теряет только эту пачку: поток записи должен жить,
+                # иначе очередь никто не разбирает и flush() при выходе ждёт вечно
+                db.rollback()
+                logger.exception("Failed to write %s cache entries to %s", self.name, self._disk_path)
+            finally:
+                for _ in ops:
+                    self._writes.task_done()
+
+    @staticmethod
+    def _write(db: sqlite3.Connection, ops: List[Tuple[str, tuple]]):
+        for op, args in ops:
+            if op == "put":
+                name, namespace, key, value, expires = args
+                try:
+                    blob = pickle.dumps(value)
+                except Exception:
+                    # Такое значение остаётся только в памяти; остальные записи пачки пишутся
+                    logger.warning("Cannot pickle %s cache entry %r, keeping it in memory only", name, key)
+                    continue
+                db.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)",
+                           (name, namespace, key, blob, expires))
+            else:
+                db.execute("DELETE FROM cache WHERE name = ? AND namespace = ?", args)
+        db.commit()
+
+    def flush(self):
+        # Дождаться, пока фоновый поток запишет всё поставленное в очередь
+        if self._writer is not None and self._writer.is_alive():
+            self._writes.join()
+
+    def _store(self, key: str, value: Any, expires: float):
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, namespace: str):
+        # Новый банк: память очищаем, на диске удаляем записи старого пространства имён
+        with self._lock:
+            self._data.clear()
+            previous, self.namespace = self.namespace, namespace
+        if self._db is not None:
+            # В той же очереди, что и записи: запись старого банка, ещё не дошедшая до диска, удаляется следом
+            self._enqueue("delete", (self.name, previous))
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.disk_hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / total if total else 0.0,
+        }
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List, Sequence
+
+MAGIC = b"QSTORE3\0"
+OPTION_LABELS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+# magic, sha256 исходного JSON, число вопросов/строк/вариантов, смещения 11 секций
+HEADER = struct.Struct("<8s32s3I11Q")
+SECTIONS = ("str_offsets", "str_blob", "q_question", "q_answers", "q_options", "q_answer", "answer_keys",
+            "q_flags", "opt_strings", "expl_offsets", "expl_blob")
+HAS_EXPLANATION = 1  # бит q_flags: у записи есть ключ "explanation" (пустая строка и отсутствие — не одно и то же)
+
+
+def file_digest(path: str) -> bytes:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def store_path(bank_path: str) -> str:
+    base, _ = os.path.splitext(bank_path)
+    return f"{base}.store"
+
+
+class QuestionRecord:
+    """Вопрос из QuestionStore; читается как прежний dict: qa["question"], qa["options"][key], qa.get(...)."""
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "QuestionStore", index: int):
+        self._store = store
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        store, i = self._store, self._index
+        if key == "question":
+            return store.string(store.q_question[i])
+        if key == "answers":
+            return store.string(store.q_answers[i])
+        if key == "options":
+            start, count = store.q_options[2 * i], store.q_options[2 * i + 1]
+            return {OPTION_LABELS[n]: store.string(store.opt_strings[start + n]) for n in range(count)}
+        if key == "answer":
+            start, count = store.q_answer[2 * i], store.q_answer[2 * i + 1]
+            return [OPTION_LABELS[store.answer_keys[start + n]] for n in range(count)]
+        if key == "explanation" and store.q_flags[i] & HAS_EXPLANATION:
+            return store.explanation(i)
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self) -> List[str]:
+        keys = ["question", "options", "answer", "answers"]
+        if self._store.q_flags[self._index] & HAS_EXPLANATION:
+            keys.append("explanation")
+        return keys
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self.keys()}
+
+
+class QuestionStore:
+    """
+    Компактное колоночное хранилище банка вопросов в одном файле, открываемом через mmap.
+
+    Все тексты (кроме пояснений) лежат в общей таблице строк без повторов,
+    вопросы ссылаются на неё целыми индексами, варианты ответа — подряд идущий
+    массив, правильные ответы — номера вариантов (байт на ответ, порядок из JSON).
+    Пояснения хранятся отдельным блоком и декодируются только по запросу.
+    Файл только читается, поэтому несколько процессов action-сервера делят
+    одни и те же страницы в памяти.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, self.digest, self.size, n_strings, n_options, *offsets = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a question store")
+
+        bounds = list(offsets) + [len(self._mmap)]
+        sections = {name: view[bounds[n]:bounds[n + 1]] for n, name in enumerate(SECTIONS)}
+        self.str_offsets = sections["str_offsets"].cast("I")[:n_strings + 1]
+        self.str_blob = sections["str_blob"]
+        self.q_question = sections["q_question"].cast("I")[:self.size]
+        self.q_answers = sections["q_answers"].cast("I")[:self.size]
+        self.q_options = sections["q_options"].cast("I")[:2 * self.size]
+        self.q_answer = sections["q_answer"].cast("I")[:2 * self.size]
+        self.answer_keys = sections["answer_keys"][:self.q_answer[-2] + self.q_answer[-1] if self.size else 0]
+        self.q_flags = sections["q_flags"][:self.size]
+        self.opt_strings = sections["opt_strings"].cast("I")[:n_options]
+        self.expl_offsets = sections["expl_offsets"].cast("Q")[:self.size + 1]
+        self.expl_blob = sections["expl_blob"]
+        # Декодированные короткие строки (вопросы, варианты) переиспользуются и интернируются
+        self._strings: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: int) -> QuestionRecord:
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        return QuestionRecord(self, index)
+
+    def __iter__(self) -> Iterator[QuestionRecord]:
+        return (QuestionRecord(self, i) for i in range(self.size))
+
+    def string(self, sid: int) -> str:
+        text = self._strings.get(sid)
+        if text is None:
+            text = sys.intern(bytes(self.str_blob[self.str_offsets[sid]:self.str_offsets[sid + 1]]).decode("utf-8"))
+            self._strings[sid] = text
+        return text
+
+    def explanation(self, index: int) -> str:
+        return bytes(self.expl_blob[self.expl_offsets[index]:self.expl_offsets[index + 1]]).decode("utf-8")
+
+    @classmethod
+    def load_or_build(cls, bank_path: str) -> "QuestionStore":
+        # Файл .store рядом с банком пересобирается, только если изменился questions.json
+        path = store_path(bank_path)
+        digest = file_digest(bank_path)
+        if os.path.exists(path):
+            with open(path, "rb") as file:
+                header = file.read(HEADER.size)
+            if len(header) == HEADER.size and HEADER.unpack(header)[:2] == (MAGIC, digest):
+                return cls(path)
+
+        with open(bank_path, "r", encoding="utf-8") as file:
+            questions = json.load(file)
+        build(questions, path, digest)
+        return cls(path)
+
+
+def build(questions: Sequence[Dict[str, Any]], path: str, digest: bytes = b"\0" * 32):
+    string_ids: Dict[str, int] = {}
+    str_offsets, str_blob = array("I", [0]), bytearray()
+
+    def sid(text: str) -> int:
+        if text not in string_ids:
+            string_ids[text] = len(string_ids)
+            str_blob.extend(text.encode("utf-8"))
+            str_offsets.append(len(str_blob))
+        return string_ids[text]
+
+    q_question, q_answers, q_options, q_answer = array("I"), array("I"), array("I"), array("I")
+    answer_keys, q_flags = array("B"), array("B")
+    opt_strings = array("I")
+    expl_offsets, expl_blob = array("Q", [0]), bytearray()
+
+    for qa in questions:
+        labels = list(qa["options"].keys())
+        if labels != list(OPTION_LABELS[:len(labels)]):
+            raise ValueError(f"Options of {qa['question']!r} are not labelled A, B, C...: {labels}")
+        q_question.append(sid(qa["question"]))
+        q_answers.append(sid(qa["answers"]))
+        q_options.extend((len(opt_strings), len(labels)))
+        opt_strings.extend(sid(text) for text in qa["options"].values())
+        unknown = [key for key in qa["answer"] if key not in qa["options"]]
+        if unknown:
+            raise ValueError(f"Answer of {qa['question']!r} refers to missing options: {unknown}")
+        # Номера правильных вариантов (A=0, B=1, ...) подряд, в порядке из JSON
+        q_answer.extend((len(answer_keys), len(qa["answer"])))
+        answer_keys.extend(OPTION_LABELS.index(key) for key in qa["answer"])
+        q_flags.append(HAS_EXPLANATION if "explanation" in qa else 0)
+        expl_blob.extend(qa.get("explanation", "").encode("utf-8"))
+        expl_offsets.append(len(expl_blob))
+
+    sections = [str_offsets.tobytes(), bytes(str_blob), q_question.tobytes(), q_answers.tobytes(),
+                q_options.tobytes(), q_answer.tobytes(), answer_keys.tobytes(), q_flags.tobytes(), opt_strings.tobytes(),
+                expl_offsets.tobytes(), bytes(expl_blob)]
+
+    # Секции выровнены по 8 байт, чтобы массивы читались через memoryview.cast
+    offsets, position = [], HEADER.size
+    for data in sections:
+        position += -position % 8
+        offsets.append(position)
+        position += len(data)
+
+    # Свой временный файл у каждого процесса: воркеры, стартующие вместе, не пишут в один
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, digest, len(q_question), len(string_ids), len(opt_strings), *offsets))
+        for offset, data in zip(offsets, sections):
+            file.write(b"\0" * (offset - file.tell()))
+            file.write(data)
+    os.replace(tmp_path, path)
@@ -0,0 +1,69 @@
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class CrossEncoderReranker:
+    """
+    Последний этап каскада: кросс-энкодер оценивает пары (запрос, вопрос банка).
+
+    Дороже bi-encoder'а в разы, поэтому вызывается только для нескольких
+    лучших кандидатов и только когда fuzzy и semantic не уверены. Все пары
+    запроса идут одним батчем. Оценка приводится к 0-1, как у остальных
+    этапов: одни модели уже отдают вероятность, другие — логиты.
+
+    Нужна ли сигмоида, решается один раз на модель (`activation`): sigmoid,
+    none или auto — по функции активации самой модели (activation_fn в
+    sentence-transformers 4+, default_activation_function в ранних версиях).
+    От значений оценок в батче это не зависит, поэтому оценки разных
+    запросов сравнимы между собой.
+    """
+
+    def __init__(self, texts: Sequence[str], get_model: Callable[[], object], batch_size: int = 32,
+                 activation: str = "auto"):
+        if activation not in ("auto", "sigmoid", "none"):
+            raise ValueError(f"Unknown rerank activation {activation!r}, expected auto, sigmoid or none")
+        self.texts = texts
+        self.get_model = get_model
+        self.batch_size = batch_size
+        self.activation = activation
+        self._sigmoid: Optional[bool] = None if activation == "auto" else activation == "sigmoid"
+        self.reranked = 0
+        self.skipped = 0
+
+    def __call__(self, query: str, indices: List[int]) -> np.ndarray:
+        if not indices:
+            return np.zeros(0, dtype=np.float32)
+        self.reranked += 1
+        pairs = [(query, self.texts[idx]) for idx in indices]
+        model = self.get_model()
+        if self._sigmoid is None:
+            self._sigmoid = returns_logits(model)
+        scores = np.asarray(model.predict(pairs, batch_size=self.batch_size), dtype=np.float32)
+        if self._sigmoid:
+            scores = 1.0 / (1.0 + np.exp(-scores))  # Логиты -> сигмоида
+        return scores
+
+    def rerank(self, query: str, found: List[Tuple[int, float]], margin: float = 0.0) -> List[Tuple[int, float]]:
+        """
+        found — top-k bi-encoder'а [(позиция, оценка)], лучшие первыми. Если
+        первый уже оторвался от второго на `margin`, кросс-энкодер не
+        вызывается и found возвращается как есть; иначе — порядок и оценки
+        кросс-энкодера.
+        """
+        if len(found) < 2 or found[0][1] - found[1][1] >= margin:
+            self.skipped += 1
+            return found
+        scores = self(query, [idx for idx, _ in found])
+        return [(found[i][0], float(scores[i])) for i in np.argsort(-scores, kind="stable")]
+
+    def stats(self) -> dict:
+        total = self.reranked + self.skipped
+        return {"reranked": self.reranked, "skipped": self.skipped,
+                "rerank_rate": self.reranked / total if total else 0.0}
+
+
+def returns_logits(model: object) -> bool:
+    # predict() отдаёт логиты, если активация модели тождественная; без известной активации считаем так же
+    activation = getattr(model, "activation_fn", None) or getattr(model, "default_activation_function", None)
+    return activation is None or type(activation).__name__ == "Identity"
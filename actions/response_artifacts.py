@@ -0,0 +1,89 @@
+import marshal
+import os
+from typing import Any, Dict, List, NamedTuple, Sequence, Tuple
+
+# Меняется при изменении формата сообщений или файла: тогда артефакты пересобираются
+ARTIFACTS_VERSION = 2
+
+
+class Response(NamedTuple):
+    """Готовая часть ответа по записи банка: пояснение дочитывается из банка при выводе."""
+    answers: str                     # строка правильного ответа ("A, C")
+    correct_options: Tuple[str, ...]  # тексты правильных вариантов
+    option_rows: Tuple[int, ...]     # их строки в индексе эмбеддингов вариантов (EmbeddingIndex "options")
+
+
+def artifacts_path(bank_path: str) -> str:
+    base, _ = os.path.splitext(bank_path)
+    return f"{base}.responses.marshal"
+
+
+def render(qa: Any, option_rows: Dict[str, int]) -> Response:
+    correct_options = tuple(qa["options"][idx] for idx in qa["answer"])
+    return Response(qa["answers"], correct_options, tuple(option_rows[option] for option in correct_options))
+
+
+class ResponseArtifacts:
+    """
+    Предсобранные ответы по позиции вопроса в банке.
+
+    Собираются один раз на версию банка и лежат рядом с индексами
+    (questions.responses.marshal); действие берёт запись по позиции
+    найденного вопроса без обхода словарей записи. Строки вариантов
+    указывают в индекс эмбеддингов вариантов, поэтому правильные варианты
+    не ищутся по тексту и не кодируются на каждый запрос.
+
+    Пояснения в артефакты не входят: они читаются из банка (qa) только для
+    найденного вопроса — из mmap QuestionStore, без копии в памяти каждого воркера.
+    """
+
+    def __init__(self, responses: List[Response], qa: Sequence[Any]):
+        self.responses = responses
+        self.qa = qa
+
+    def __len__(self) -> int:
+        return len(self.responses)
+
+    def get(self, index: int) -> Response:
+        return self.responses[index]
+
+    def explanation(self, index: int) -> str:
+        return self.qa[index].get("explanation", "Explanation not found.")
+
+    # Те же сообщения, что раньше собирались в run() на каждый запрос
+    def question_message(self, index: int) -> str:
+        """Хвост сообщения action_answer_question (после типа ответа)."""
+        return f" \n\n\nCorrect answer: ✅ {self.responses[index].answers}\n\n\n Explanation: {self.explanation(index)}"
+
+    def choice_message(self, index: int) -> str:
+        """Хвост сообщения action_answer_multiple_choice (после оценок вариантов)."""
+        return f" \n\n\n Correct answer:✅ {self.responses[index].answers} \n\n Explanation: {self.explanation(index)}"
+
+    @classmethod
+    def build(cls, qa: Sequence[Any], option_texts: Sequence[str]) -> "ResponseArtifacts":
+        option_rows = {text: row for row, text in enumerate(option_texts)}
+        return cls([render(item, option_rows) for item in qa], qa)
+
+    @classmethod
+    def load_or_build(cls, bank_path: str, qa: Sequence[Any], option_texts: Sequence[str],
+                      digest: str) -> "ResponseArtifacts":
+        # digest — хэш questions.json: любая правка ответа или пояснения пересобирает артефакты
+        path = artifacts_path(bank_path)
+        try:
+            with open(path, "rb") as f:
+                cached = marshal.loads(f.read())
+            if cached.get("version") == ARTIFACTS_VERSION and cached.get("digest") == digest:
+                return cls([Response(*row) for row in cached["responses"]], qa)
+        except (OSError, EOFError, ValueError, TypeError, AttributeError):
+            pass
+
+        artifacts = cls.build(qa, option_texts)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                marshal.dump({"version": ARTIFACTS_VERSION, "digest": digest,
+                              "responses": [tuple(response) for response in artifacts.responses]}, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass  # Каталог банка только для чтения: работаем с собранными в памяти
+        return artifacts
@@ -0,0 +1,7 @@
+# Единый поиск по банку вопросов для всех действий (actions/actions.py и варианты из lib/actions):
+# один загрузчик банка, общие индексы и кэши, стратегия поиска (fuzz, semantic, hybrid) — настройка
+# settings.STRATEGY (раздел retrieval: в endpoints.yml). Синглтоны процесса — в actions.retrieval.engine,
+# он загружает банк при импорте, поэтому здесь не импортируется
+from actions.retrieval.bank import BankSnapshot, load_bank, load_questions_data
+from actions.retrieval.strategies import STRATEGIES, FuzzStrategy, HybridStrategy, SemanticStrategy, Strategy
+
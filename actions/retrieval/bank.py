@@ -0,0 +1,120 @@
+import json
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, List, NamedTuple, Optional
+
+import numpy as np
+
+from actions import settings
+from actions.embedding_index import EmbeddingIndex, content_hash
+from actions.exact_match import ExactMatchIndex
+from actions.fuzzy_matcher import FuzzyMatcher
+from actions.hybrid_retriever import HybridRetriever
+from actions.model_registry import get_cross_encoder, get_model, lazy
+from actions.prefilter import NgramIndex
+from actions.question_store import QuestionStore, file_digest
+from actions.reranker import CrossEncoderReranker
+from actions.response_artifacts import ResponseArtifacts
+from actions.vector_index import make_vector_index
+
+# Эмбеддинги int8/onnx немного отличаются от torch, поэтому бэкенд входит в ключ индекса
+MODEL_KEY = f"{settings.MODEL_NAME}:{settings.MODEL_BACKEND}"
+
+# Загружаем данные из JSON-файла
+def load_questions_data(file_path: str):
+    with open(file_path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    return data
+
+class BankSnapshot(NamedTuple):
+    """Неизменяемый снимок банка со всеми индексами; запрос берёт снимок один раз и работает с ним до конца."""
+    qa: Any  # QuestionStore или список словарей; записи читаются как qa["question"], qa["options"], ...
+    texts: List[str]
+    digest: str
+    exact: ExactMatchIndex
+    matcher: FuzzyMatcher
+    question_index: Callable[[], EmbeddingIndex]
+    option_index: Callable[[], EmbeddingIndex]
+    retriever: Callable[[], HybridRetriever]
+    reranker: Optional[CrossEncoderReranker]  # settings.CROSS_ENCODER; None — без переранжирования
+    responses: Callable[[], ResponseArtifacts]  # готовые ответы по позиции вопроса
+
+# Эмбеддинги вопросов банка считаются один раз и хранятся рядом с questions.json;
+# пересобираются только при изменении банка или модели
+def load_question_index(bank_path: str, texts: List[str], previous: Optional[EmbeddingIndex] = None):
+    index = EmbeddingIndex.load_or_build(bank_path, "questions", texts, get_model, MODEL_KEY, previous=previous)
+    # Для больших банков — приближённый поиск (ivf/hnsw) вместо полного прохода.
+    # При перезагрузке индекс прошлого снимка переносится с правкой только изменившихся вопросов
+    if settings.VECTOR_INDEX != "exact":
+        index.carry_vector_index(previous, lambda: make_vector_index(
+            settings.VECTOR_INDEX, index.embeddings.shape[1],
+            nlist=settings.IVF_NLIST, nprobe=settings.IVF_NPROBE, m=settings.HNSW_M, ef=settings.HNSW_EF,
+        ))
+    return index
+
+# Единственный загрузчик банка для всех действий: encode_query — кодирование запроса с кэшем,
+# span — замер этапов (actions.retrieval.engine передаёт свои)
+def load_bank(bank_path: str, previous: Optional[BankSnapshot] = None,
+              encode_query: Optional[Callable[[str], np.ndarray]] = None,
+              span: Callable[[str], ContextManager] = lambda stage: nullcontext()) -> BankSnapshot:
+    # Вопросы: по умолчанию из mmap-хранилища (actions.question_store), записи читаются как прежние словари
+    qa = QuestionStore.load_or_build(bank_path) if settings.QUESTION_STORE else load_questions_data(bank_path)
+    texts = [item["question"] for item in qa]
+    # Эмбеддинги всех (уникальных) вариантов ответа банка — правильные варианты не кодируются на каждый запрос
+    option_texts = list(dict.fromkeys(option for item in qa for option in item["options"].values()))
+
+    # При перезагрузке эмбеддинги неизменившихся текстов берутся из прошлого снимка, кодируются только новые
+    previous_questions = previous_options = None
+    if previous is not None:
+        previous_questions = previous.question_index() if previous.question_index.loaded() else None
+        previous_options = previous.option_index() if previous.option_index.loaded() else None
+
+    # Вопросы, вставленные дословно из банка, находятся по хэшу без инференса модели
+    exact = ExactMatchIndex(texts)
+    # Вопросы банка для нечёткого поиска приводятся к нижнему регистру один раз при загрузке
+    matcher = FuzzyMatcher(texts)
+    question_index = lazy(lambda: load_question_index(bank_path, texts, previous_questions))
+    option_index = lazy(lambda: EmbeddingIndex.load_or_build(
+        bank_path, "options", option_texts, get_model, MODEL_KEY, previous=previous_options
+    ))
+
+    # Кросс-энкодер загружается при первом неуверенном запросе, а не при старте
+    reranker = (CrossEncoderReranker(texts, lambda: get_cross_encoder(settings.CROSS_ENCODER),
+                                     activation=settings.RERANK_ACTIVATION)
+                if settings.CROSS_ENCODER else None)
+
+    # Гибридный поиск: префильтр по n-граммам + fuzzy/semantic переранжирование кандидатов
+    retriever = lazy(lambda: HybridRetriever(
+        NgramIndex(texts, n=settings.PREFILTER_NGRAM),
+        matcher,
+        question_index(),
+        encode_query,
+        fusion=settings.FUSION_METHOD,
+        candidates=settings.PREFILTER_CANDIDATES,
+        rrf_k=settings.RRF_K,
+        fuzz_weight=settings.FUZZ_WEIGHT,
+        exact=exact,
+        span=span,
+        fuzz_threshold=settings.CASCADE_FUZZ_THRESHOLD,
+        fuzz_margin=settings.CASCADE_FUZZ_MARGIN,
+        semantic_threshold=settings.CASCADE_SEMANTIC_THRESHOLD,
+        semantic_margin=settings.CASCADE_SEMANTIC_MARGIN,
+        reranker=reranker,
+        rerank_top=settings.RERANK_TOP,
+    ))
+
+    # Тексты ответов, правильные варианты и их строки в option_index — собраны заранее, рядом с индексами
+    bank_digest = getattr(qa, "digest", None) or file_digest(bank_path)
+    responses = lazy(lambda: ResponseArtifacts.load_or_build(bank_path, qa, option_texts, bank_digest.hex()))
+
+    bank = BankSnapshot(qa, texts, content_hash(texts, MODEL_KEY), exact, matcher,
+                        question_index, option_index, retriever, reranker, responses)
+    # Перезагрузка идёт в фоне: всё, что было загружено в прошлом снимке, собираем до подмены,
+    # чтобы первый запрос к новому банку не ждал
+    if previous_questions is not None:
+        bank.question_index()
+    if previous is not None and previous.retriever.loaded():
+        bank.retriever()
+    if previous_options is not None:
+        bank.option_index()
+    bank.responses()
+    return bank
@@ -0,0 +1,332 @@
+import asyncio
+import time
+from functools import partial
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from actions import settings
+from actions.bank_manager import BankManager
+from actions.batch_encoder import BatchEncoder
+from actions.embedding_index import encode_normalized
+from actions.fuzzy_matcher import init_worker, match_options_fuzz, worker_extract
+from actions.hybrid_retriever import Match
+from actions.inference_pool import InferencePool, PoolBusy
+from actions.metrics import SCORE_BUCKETS, Metrics, Profiler, serve
+from actions.model_registry import get_cross_encoder, get_model, warm_up
+from actions.query_cache import QueryCache
+from actions.retrieval.bank import MODEL_KEY, BankSnapshot, load_bank
+from actions.retrieval.strategies import STRATEGIES, Strategy, make_strategies
+from actions.retrieval_service import RetrievalClient, RetrievalError
+
+# Общий для всех действий процесса поиск: один снимок банка, одни индексы, кэши, пул и метрики.
+# Модель sentence-transformers общая для всех действий и загружается лениво (actions.model_registry)
+
+# Замеры этапов, счётчики ответов и профили доли запросов; отдаются на /metrics (settings.METRICS_PORT)
+METRICS = Metrics()
+PROFILER = Profiler(settings.PROFILE_RATE, settings.PROFILE_DIR, settings.PROFILER)
+
+# Нормированный вектор вопроса: скалярное произведение равно косинусной схожести
+def encode_query(text: str):
+    embedding = EMBEDDING_CACHE.get(text)
+    if embedding is None:
+        with METRICS.span("encode"):
+            if settings.BATCH_ENCODER:
+                embedding = BATCH_ENCODER.encode(text)
+            else:
+                embedding = encode_normalized(get_model(), [text])[0]
+        EMBEDDING_CACHE.put(text, embedding)
+    return embedding
+
+# Кодирование пачки запросов: готовые эмбеддинги из кэша, остальные — одним вызовом модели
+def encode_queries(texts: List[str]) -> np.ndarray:
+    cached = [EMBEDDING_CACHE.get(text) for text in texts]
+    missing = [i for i, embedding in enumerate(cached) if embedding is None]
+    if missing:
+        with METRICS.span("encode"):
+            encoded = encode_normalized(get_model(), [texts[i] for i in missing])
+        for i, embedding in zip(missing, encoded):
+            cached[i] = embedding
+            EMBEDDING_CACHE.put(texts[i], embedding)
+    return np.stack(cached)
+
+# Банк с индексами; при изменении questions.json пересобирается в фоне и подменяется целиком
+BANK = BankManager(settings.QUESTIONS_PATH, partial(load_bank, encode_query=encode_query, span=METRICS.span),
+                   interval=settings.BANK_RELOAD_INTERVAL)
+
+# Стратегии поиска по одному снимку; по умолчанию — settings.STRATEGY (раздел retrieval: endpoints.yml)
+STRATEGY_INSTANCES = make_strategies(encode_query, span=METRICS.span,
+                                     rerank_top=settings.RERANK_TOP, rerank_margin=settings.RERANK_MARGIN)
+
+def get_strategy(name: Optional[str] = None) -> Strategy:
+    name = name or settings.STRATEGY
+    if name not in STRATEGY_INSTANCES:
+        raise ValueError(f"Unknown retrieval strategy {name!r}, expected one of {tuple(STRATEGIES)}")
+    return STRATEGY_INSTANCES[name]
+
+STRATEGY = get_strategy()
+
+# Общий сервис поиска (settings.RETRIEVAL_SERVICE): модель и эмбеддинги держит он, здесь — только банк и fuzzy
+RETRIEVAL_CLIENT = (RetrievalClient(settings.RETRIEVAL_SERVICE, timeout=2 * settings.REQUEST_TIMEOUT)
+                    if settings.RETRIEVAL_SERVICE else None)
+
+# Ответ сервиса — текст вопроса; позицию ищем в своём снимке банка (при расхождении банков — fuzzy по тексту)
+def remote_search(bank: BankSnapshot, user_question: str, method: str = "hybrid") -> Match:
+    return resolve_remote(bank, *RETRIEVAL_CLIENT.search(user_question, k=1, method=method)[0])
+
+def resolve_remote(bank: BankSnapshot, text: str, score: float, found_method: str) -> Match:
+    idx = bank.exact.position(text)
+    if idx is None:
+        idx = bank.matcher.extract(text, k=1)[0][0]
+    return Match(idx, score, found_method)
+
+# Найденный ответ зависит от банка и настроек поиска
+def result_namespace(bank: BankSnapshot) -> str:
+    namespace = f"{bank.digest}:{settings.FUSION_METHOD}:{settings.PREFILTER_CANDIDATES}"
+    if settings.FUSION_METHOD == "cascade":
+        namespace += (f":{settings.CASCADE_FUZZ_THRESHOLD}/{settings.CASCADE_FUZZ_MARGIN}"
+                      f":{settings.CASCADE_SEMANTIC_THRESHOLD}/{settings.CASCADE_SEMANTIC_MARGIN}")
+    return namespace + (f":{settings.CROSS_ENCODER}/{settings.RERANK_TOP}/{settings.RERANK_MARGIN}"
+                        f"/{settings.RERANK_ACTIVATION}")
+
+# ...и от стратегии: один кэш на все стратегии процесса, стратегия — часть ключа
+def result_key(user_question: str, strategy: Strategy) -> str:
+    return f"{strategy.name}:{user_question}"
+
+# Кэши по тексту запроса: эмбеддинг зависит только от модели, найденный ответ — от банка, настроек и стратегии
+EMBEDDING_CACHE = QueryCache(
+    "embedding", settings.CACHE_SIZE, settings.CACHE_TTL,
+    namespace=MODEL_KEY, disk_path=settings.CACHE_PATH or None,
+)
+RESULT_CACHE = QueryCache(
+    "result", settings.CACHE_SIZE, settings.CACHE_TTL,
+    namespace=result_namespace(BANK.current),
+    disk_path=settings.CACHE_PATH or None,
+)
+
+# Одновременные запросы разных сессий кодируются одним батчем
+BATCH_ENCODER = BatchEncoder(get_model, max_wait=settings.BATCH_WINDOW_MS / 1000, max_batch=settings.BATCH_MAX_SIZE)
+
+# Функция для нахождения наиболее похожего вопроса с использованием sentence-transformers
+def find_similar_question_semantic(user_question: str):
+    bank = BANK.current
+    if RETRIEVAL_CLIENT is not None and bank.exact.position(user_question) is None:
+        match = remote_search(bank, user_question, method="semantic")
+    else:
+        match = get_strategy("semantic").search(bank, user_question)[0]
+    return bank.qa[match.index], match.score  # Возвращаем кортеж (qa, similarity)
+
+def find_similar_option_semantic(correct_options: List[str], user_options: List[str],
+                                 correct_rows: Optional[Sequence[int]] = None, bank: Optional[BankSnapshot] = None):
+    if not correct_options or not user_options:
+        return []
+
+    if RETRIEVAL_CLIENT is not None:
+        with METRICS.span("options"):
+            return RETRIEVAL_CLIENT.options(correct_options, user_options)
+
+    with PROFILER.sample("options"), METRICS.span("options"):
+        # Один батч для вариантов пользователя, правильные варианты — из готового индекса
+        user_embeddings = encode_normalized(get_model(), user_options)
+        option_index = (bank or BANK.current).option_index()
+        if correct_rows is not None:
+            # Строки из предсобранного ответа того же снимка банка (actions.response_artifacts): без поиска по тексту
+            correct_embeddings = option_index.embeddings[np.asarray(correct_rows, dtype=np.int64)]
+        else:
+            correct_embeddings = option_index.lookup(correct_options, get_model)
+
+        # Матрица схожести U x C и argmax по строкам
+        similarity = user_embeddings @ correct_embeddings.T
+        best = similarity.argmax(axis=1)
+
+    # Кортежи (correct, user, score) как и раньше — по одному на вариант пользователя
+    return [
+        (correct_options[c], uqa, float(similarity[row, c]))
+        for row, (uqa, c) in enumerate(zip(user_options, best))
+    ]
+
+# Функция для нахождения наиболее похожего вопроса с использованием RapidFuzz
+def find_similar_question_fuzz(user_question: str):
+    bank = BANK.current
+    match = get_strategy("fuzz").search(bank, user_question)[0]  # Уже нормировано к 0-1
+    return bank.qa[match.index], match.score  # Возвращаем кортеж (qa, similarity)
+
+# Поиск по снимку банка с замером и (для доли запросов) профилем
+def search_question(bank: BankSnapshot, user_question: str, strategy: Optional[Strategy] = None) -> Match:
+    strategy = strategy or STRATEGY
+    with PROFILER.sample("question"), METRICS.span("retrieve"):
+        # Без модели стратегия отвечает сама, с моделью — сервис, если он задан
+        if RETRIEVAL_CLIENT is not None and strategy.uses_model:
+            return remote_search(bank, user_question, strategy.name)
+        return strategy.search(bank, user_question, k=1)[0]
+
+# Находим вопрос стратегией поиска (по умолчанию settings.STRATEGY); возвращаем (qa, score, method)
+def find_similar_question(user_question: str, strategy: Optional[Strategy] = None):
+    strategy = strategy or STRATEGY
+    bank = BANK.current
+    namespace = result_namespace(bank)
+    match = RESULT_CACHE.get(result_key(user_question, strategy), namespace)
+    if match is None:
+        match = search_question(bank, user_question, strategy)
+        RESULT_CACHE.put(result_key(user_question, strategy), match, namespace)
+    return bank.qa[match.index], match.score, match.method
+
+# Пачка вопросов (вставленный целиком экзамен): (позиция, Match) по мере готовности —
+# кэш и найденное без модели сразу, остальное после одного батча модели
+def match_questions_batch(bank: BankSnapshot, user_questions: List[str],
+                          strategy: Optional[Strategy] = None) -> Iterator[Tuple[int, Match]]:
+    strategy = strategy or STRATEGY
+    namespace = result_namespace(bank)
+    pending = []
+    for position, user_question in enumerate(user_questions):
+        match = RESULT_CACHE.get(result_key(user_question, strategy), namespace)
+        if match is None:
+            pending.append(position)
+        else:
+            yield position, match
+    if not pending:
+        return
+
+    with PROFILER.sample("batch"), METRICS.span("retrieve_batch"):
+        if RETRIEVAL_CLIENT is not None and strategy.uses_model:
+            found = RETRIEVAL_CLIENT.search_batch([user_questions[i] for i in pending], method=strategy.name)
+            matches = ((row, resolve_remote(bank, *match)) for row, match in enumerate(found))
+        else:
+            matches = strategy.search_batch(bank, [user_questions[i] for i in pending], encode_queries)
+        for row, match in matches:
+            position = pending[row]
+            RESULT_CACHE.put(result_key(user_questions[position], strategy), match, namespace)
+            yield position, match
+
+def find_similar_questions_batch(user_questions: List[str],
+                                 strategy: Optional[Strategy] = None) -> Iterator[Tuple[int, Any, float, str]]:
+    bank = BANK.current
+    for position, match in match_questions_batch(bank, user_questions, strategy):
+        yield position, bank.qa[match.index], match.score, match.method
+
+# Пул для тяжёлых вызовов из асинхронных действий; fuzzy в отдельных процессах, если QUIZ_FUZZY_PROCESSES > 0
+INFERENCE_POOL = InferencePool(
+    threads=settings.INFERENCE_THREADS,
+    processes=settings.FUZZY_PROCESSES,
+    max_pending=settings.MAX_PENDING,
+    timeout=settings.REQUEST_TIMEOUT,
+    process_initializer=init_worker,
+    process_initargs=(BANK.current.texts,),
+)
+
+# Этапы поиска для search_question_async; оба идут в пуле, кэш эмбеддингов (и его диск) — тоже там
+def plan_question(bank: BankSnapshot, user_question: str,
+                  strategy: Strategy) -> Tuple[Optional[Match], Any, Optional[np.ndarray]]:
+    match, state = strategy.plan(bank, user_question)
+    return match, state, EMBEDDING_CACHE.get(user_question) if match is None else None
+
+def finish_question(bank: BankSnapshot, user_question: str, strategy: Strategy, state: Any,
+                    embedding: np.ndarray, encoded: bool) -> Match:
+    if encoded:
+        EMBEDDING_CACHE.put(user_question, embedding)
+    return strategy.finish(bank, user_question, state, embedding)
+
+# С батчером поток пула не ждёт батча модели: этап без модели — в пуле, кодирование — ожидание future
+# батчера в event loop, оценка кандидатов — снова в пуле. Если бы ждал поток, в батч попадало бы
+# не больше запросов, чем settings.INFERENCE_THREADS. settings.REQUEST_TIMEOUT — один срок на все три этапа
+async def search_question_async(bank: BankSnapshot, user_question: str, strategy: Strategy) -> Match:
+    if not settings.BATCH_ENCODER or not strategy.uses_model or RETRIEVAL_CLIENT is not None:
+        return await INFERENCE_POOL.run(search_question, bank, user_question, strategy)
+
+    deadline = time.monotonic() + INFERENCE_POOL.timeout
+    with METRICS.span("retrieve"):
+        match, state, embedding = await INFERENCE_POOL.run(plan_question, bank, user_question, strategy,
+                                                           timeout=deadline - time.monotonic())
+        if match is not None:
+            return match
+        encoded = embedding is None
+        if encoded:
+            with METRICS.span("encode"):
+                embedding = await INFERENCE_POOL.wait(BATCH_ENCODER.encode_async(user_question),
+                                                      deadline - time.monotonic())
+        return await INFERENCE_POOL.run(finish_question, bank, user_question, strategy, state, embedding, encoded,
+                                        timeout=deadline - time.monotonic())
+
+# Асинхронный поиск: модель в пуле потоков, при таймауте или перегрузке — ответ только по fuzzy.
+# Возвращает снимок банка и Match: действия берут по match.index готовый ответ из того же снимка
+async def match_question_async(user_question: str,
+                               strategy: Optional[Strategy] = None) -> Tuple[BankSnapshot, Match]:
+    strategy = strategy or STRATEGY
+    bank = BANK.current
+    namespace = result_namespace(bank)
+    match = RESULT_CACHE.get(result_key(user_question, strategy), namespace)
+    if match is not None:
+        return bank, match
+
+    try:
+        match = await search_question_async(bank, user_question, strategy)
+    except (asyncio.TimeoutError, PoolBusy, RetrievalError):
+        # Деградировавший ответ не кэшируем: в следующий раз модель может успеть
+        fallback = worker_extract if settings.FUZZY_PROCESSES else bank.matcher.extract
+        idx, score = (await INFERENCE_POOL.run_fuzzy(fallback, user_question))[0]
+        return bank, Match(idx, score, "fuzz-fallback")
+
+    RESULT_CACHE.put(result_key(user_question, strategy), match, namespace)
+    return bank, match
+
+async def find_similar_question_async(user_question: str, strategy: Optional[Strategy] = None):
+    bank, match = await match_question_async(user_question, strategy)
+    return bank.qa[match.index], match.score, match.method
+
+async def find_similar_option_async(correct_options: List[str], user_options: List[str],
+                                    correct_rows: Optional[Sequence[int]] = None, bank: Optional[BankSnapshot] = None):
+    try:
+        return await INFERENCE_POOL.run(find_similar_option_semantic, correct_options, user_options, correct_rows, bank)
+    except (asyncio.TimeoutError, PoolBusy, RetrievalError):
+        return match_options_fuzz(correct_options, user_options)
+
+# Пачка целиком в пуле; при таймауте или перегрузке — вся пачка по fuzzy (cdist в несколько потоков).
+# Срок растёт с размером пачки: экзамен из 80 вопросов не должен укладываться в срок одного запроса
+async def match_questions_batch_async(user_questions: List[str], strategy: Optional[Strategy] = None
+                                      ) -> Tuple[BankSnapshot, List[Tuple[int, Match]]]:
+    bank = BANK.current
+    timeout = settings.REQUEST_TIMEOUT + settings.BATCH_QUESTION_TIMEOUT * len(user_questions)
+    try:
+        return bank, await INFERENCE_POOL.run(lambda: list(match_questions_batch(bank, user_questions, strategy)),
+                                              timeout=timeout)
+    except (asyncio.TimeoutError, PoolBusy, RetrievalError):
+        found = await INFERENCE_POOL.run_fuzzy(bank.matcher.extract_batch, user_questions)
+        return bank, [(position, Match(*matches[0], "fuzz-fallback")) for position, matches in enumerate(found)]
+
+# После подмены банка: кэш ответов переходит на новый хэш, процессы fuzzy получают новые тексты
+def on_bank_swap(bank: BankSnapshot, previous: BankSnapshot):
+    RESULT_CACHE.invalidate(result_namespace(bank))
+    INFERENCE_POOL.reset_fuzzy((bank.texts,))
+
+BANK.on_swap(on_bank_swap)
+BANK.start()
+
+# Статистика кэшей, точного поиска, пула и перезагрузок банка — в /metrics при каждом чтении
+METRICS.collect("result_cache", RESULT_CACHE.stats)
+METRICS.collect("embedding_cache", EMBEDDING_CACHE.stats)
+METRICS.collect("exact", lambda: BANK.current.exact.stats())
+METRICS.collect("inference_pool", INFERENCE_POOL.stats)
+METRICS.collect("batch_encoder", BATCH_ENCODER.stats)
+METRICS.collect("bank", BANK.stats)
+METRICS.collect("profiler", PROFILER.stats)
+METRICS.collect("reranker", lambda: BANK.current.reranker.stats() if BANK.current.reranker else {})
+if settings.METRICS_PORT:
+    serve(METRICS, settings.METRICS_PORT, settings.METRICS_HOST)
+
+# Какой метод ответил, с какой оценкой и за сколько — по каждому действию
+def record_answer(action: str, method: str, score: float, started: float):
+    METRICS.inc("answers_total", action=action, method=method)
+    METRICS.observe("match_score", score, SCORE_BUCKETS, action=action, method=method)
+    METRICS.observe("action_seconds", time.perf_counter() - started, action=action)
+
+# Модель и индексы грузятся в фоне: сервер принимает соединения сразу (с сервисом поиска грузить нечего).
+# Индекс вопросов нужен hybrid (вместе с префильтром) и semantic, fuzz обходится без модели
+def warm_up_questions():
+    if STRATEGY.name == "hybrid":
+        BANK.current.retriever()
+    elif STRATEGY.uses_model:
+        BANK.current.question_index()
+
+if settings.MODEL_WARMUP and RETRIEVAL_CLIENT is None:
+    warm_up(get_model, lambda: BANK.current.option_index(), warm_up_questions,
+            lambda: settings.CROSS_ENCODER and get_cross_encoder(settings.CROSS_ENCODER))
@@ -0,0 +1,164 @@
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Sequence, Tuple, Type
+
+import numpy as np
+
+from actions.hybrid_retriever import Match
+from actions.retrieval.bank import BankSnapshot
+
+
+class Strategy:
+    """
+    Способ поиска вопроса по снимку банка.
+
+    Индексы (exact, fuzzy, эмбеддинги, префильтр, кросс-энкодер) принадлежат
+    снимку и общие для всех стратегий: стратегия только решает, какие из них
+    спрашивать. Поэтому переключение стратегии не загружает ничего заново,
+    а кэш ответов различает стратегии по имени (actions.retrieval.engine).
+    """
+
+    name = ""
+    uses_model = True  # False — стратегия отвечает без инференса модели
+
+    def __init__(self, encode_query: Callable[[str], np.ndarray],
+                 span: Callable[[str], ContextManager] = lambda stage: nullcontext(),
+                 rerank_top: int = 5, rerank_margin: float = 0.05):
+        self.encode_query = encode_query
+        self.span = span
+        self.rerank_top = rerank_top
+        self.rerank_margin = rerank_margin
+
+    def search(self, bank: BankSnapshot, query: str, k: int = 1) -> List[Match]:
+        """Top-k вопросов банка, лучшие первыми; вопрос, вставленный дословно, — первым с методом exact."""
+        idx = bank.exact.lookup(query)
+        if idx is None:
+            return self._search(bank, query, k)
+        found = [Match(idx, 1.0, "exact")]
+        if k > 1:
+            found += [match for match in self._search(bank, query, k) if match.index != idx][:k - 1]
+        return found
+
+    def search_batch(self, bank: BankSnapshot, queries: Sequence[str],
+                     encode_batch: Callable[[List[str]], np.ndarray]) -> Iterator[Tuple[int, Match]]:
+        """Top-1 для каждого запроса пачки: (позиция запроса, Match) по мере готовности."""
+        pending = []
+        for row, query in enumerate(queries):
+            idx = bank.exact.lookup(query)
+            if idx is None:
+                pending.append(row)
+            else:
+                yield row, Match(idx, 1.0, "exact")
+        if pending:
+            for row, match in self._search_batch(bank, [queries[i] for i in pending], encode_batch):
+                yield pending[row], match
+
+    def plan(self, bank: BankSnapshot, query: str) -> Tuple[Optional[Match], Any]:
+        """
+        Top-1 в два этапа для асинхронных действий: этап без модели.
+
+        (Match, None), если ответ найден без модели; иначе (None, state) —
+        тогда запрос кодируется отдельно и поиск завершает finish.
+        """
+        idx = bank.exact.lookup(query)
+        if idx is not None:
+            return Match(idx, 1.0, "exact"), None
+        if not self.uses_model:
+            return self._search(bank, query, 1)[0], None
+        return None, None
+
+    def finish(self, bank: BankSnapshot, query: str, state: Any, query_embedding: np.ndarray) -> Match:
+        """Этап с моделью по состоянию plan и готовому эмбеддингу запроса."""
+        raise NotImplementedError
+
+    def _search(self, bank: BankSnapshot, query: str, k: int) -> List[Match]:
+        raise NotImplementedError
+
+    def _search_batch(self, bank: BankSnapshot, queries: List[str],
+                      encode_batch: Callable[[List[str]], np.ndarray]) -> Iterator[Tuple[int, Match]]:
+        for row, query in enumerate(queries):
+            yield row, self._search(bank, query, 1)[0]
+
+
+class FuzzStrategy(Strategy):
+    """Только rapidfuzz по всему банку: без модели, оценка — схожесть строк."""
+
+    name = "fuzz"
+    uses_model = False
+
+    def _search(self, bank: BankSnapshot, query: str, k: int) -> List[Match]:
+        with self.span("fuzz"):
+            return [Match(idx, score, "fuzz") for idx, score in bank.matcher.extract(query, k=k)]
+
+    def _search_batch(self, bank, queries, encode_batch):
+        # Матрица запросы x банк одним cdist в несколько потоков
+        with self.span("fuzz"):
+            found = bank.matcher.extract_batch(queries)
+        for row, matches in enumerate(found):
+            yield row, Match(*matches[0], "fuzz")
+
+
+class SemanticStrategy(Strategy):
+    """
+    Только эмбеддинги: косинусная схожесть с вопросами банка (точный проход
+    или ivf/hnsw индекса снимка). С кросс-энкодером top `rerank_top`
+    переоцениваются одним батчем, если первый не оторвался от второго на
+    `rerank_margin`.
+    """
+
+    name = "semantic"
+
+    def _rank(self, bank: BankSnapshot, query: str, query_embedding: np.ndarray, k: int) -> List[Match]:
+        if bank.reranker is None:
+            with self.span("semantic"):
+                found = bank.question_index().search(query_embedding, k=k)
+            return [Match(idx, score, "semantic") for idx, score in found]
+
+        with self.span("semantic"):
+            found = bank.question_index().search(query_embedding, k=max(k, self.rerank_top))
+        with self.span("rerank"):
+            reranked = bank.reranker.rerank(query, found, self.rerank_margin)
+        method = "semantic" if reranked is found else "rerank"
+        return [Match(idx, score, method) for idx, score in reranked[:k]]
+
+    def _search(self, bank, query, k):
+        return self._rank(bank, query, self.encode_query(query), k)
+
+    def finish(self, bank, query, state, query_embedding):
+        return self._rank(bank, query, query_embedding, 1)[0]
+
+    def _search_batch(self, bank, queries, encode_batch):
+        # Один вызов модели на всю пачку
+        for row, query_embedding in enumerate(encode_batch(queries)):
+            yield row, self._rank(bank, queries[row], query_embedding, 1)[0]
+
+
+class HybridStrategy(Strategy):
+    """Префильтр по n-граммам + fuzzy/semantic по кандидатам (actions.hybrid_retriever, settings.FUSION_METHOD)."""
+
+    name = "hybrid"
+
+    def search(self, bank, query, k=1):
+        # exact — первый этап самого HybridRetriever
+        return bank.retriever().search(query, k=k)
+
+    def plan(self, bank, query):
+        # Без общих n-грамм с банком кандидаты — весь банк (HybridRetriever.candidates), так что ответ есть всегда
+        matches, state = bank.retriever().lexical(query)
+        return (None, state) if state is not None else (matches[0], None)
+
+    def finish(self, bank, query, state, query_embedding):
+        return bank.retriever().finish(query, state, query_embedding)[0]
+
+    def search_batch(self, bank, queries, encode_batch):
+        for row, found in bank.retriever().search_batch(queries, encode_batch):
+            yield row, found[0]
+
+
+STRATEGIES: Dict[str, Type[Strategy]] = {
+    strategy.name: strategy for strategy in (FuzzStrategy, SemanticStrategy, HybridStrategy)
+}
+
+
+def make_strategies(encode_query: Callable[[str], np.ndarray], **kwargs) -> Dict[str, Strategy]:
+    # По экземпляру каждой стратегии на процесс: все работают с одним и тем же снимком банка
+    return {name: strategy(encode_query, **kwargs) for name, strategy in STRATEGIES.items()}
@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+import socket
+import socketserver
+import threading
+from typing import Any, List, Tuple
+
+
+class RetrievalError(RuntimeError):
+    """Сервис поиска недоступен или вернул ошибку."""
+
+
+# Свои подклассы, а не атрибуты на классах socketserver: те общие для всего процесса
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def parse_address(address: str) -> Tuple[int, Any]:
+    # "unix:/tmp/quiz-retrieval.sock" или "127.0.0.1:8765"
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+class RetrievalClient:
+    """
+    Клиент сервиса поиска: вместо своей модели и матрицы эмбеддингов
+    процесс action-сервера спрашивает один общий процесс.
+
+    Протокол — JSON-строка запроса и JSON-строка ответа по постоянному
+    соединению (Unix-сокет или localhost TCP), по соединению на поток.
+    Сервис отвечает текстом найденного вопроса, а не позицией: клиент
+    находит запись в своём снимке банка, даже если банки перезагрузились
+    не одновременно.
+    """
+
+    def __init__(self, address: str, timeout: float = 5.0):
+        self.address = address
+        self.timeout = timeout
+        self._family, self._target = parse_address(address)
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            sock = socket.socket(self._family, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self._target)
+            connection = self._local.connection = (sock, sock.makefile("rwb"))
+        return connection
+
+    def _close(self):
+        connection = getattr(self._local, "connection", None)
+        self._local.connection = None
+        if connection is not None:
+            connection[1].close()
+            connection[0].close()
+
+    def call(self, op: str, **params) -> dict:
+        request = (json.dumps({"op": op, **params}, ensure_ascii=False) + "\n").encode("utf-8")
+        # Одна повторная попытка: сервис мог перезапуститься и закрыть старое соединение
+        for attempt in range(2):
+            try:
+                _, stream = self._connection()
+                stream.write(request)
+                stream.flush()
+                line = stream.readline()
+                if not line:
+                    raise ConnectionError("connection closed by the retrieval service")
+                break
+            except OSError as error:
+                self._close()
+                if attempt:
+                    raise RetrievalError(f"Retrieval service {self.address} is unavailable: {error}") from error
+        response = json.loads(line)
+        if not response.get("ok"):
+            raise RetrievalError(response.get("error", "unknown error"))
+        return response
+
+    def search(self, text: str, k: int = 1, method: str = "hybrid") -> List[Tuple[str, float, str]]:
+        """Top-k вопросов банка: [(текст вопроса, оценка, метод)]; method — стратегия hybrid, semantic или fuzz."""
+        return [tuple(match) for match in self.call("search", text=text, k=k, method=method)["matches"]]
+
+    def search_batch(self, texts: List[str], method: str = "hybrid") -> List[Tuple[str, float, str]]:
+        """Top-1 для каждого запроса пачки, в порядке запросов; модель считает всю пачку одним батчем."""
+        return [tuple(match) for match in self.call("search_batch", texts=texts, method=method)["matches"]]
+
+    def options(self, correct_options: List[str], user_options: List[str]) -> List[Tuple[str, str, float]]:
+        response = self.call("options", correct=correct_options, user=user_options)
+        return [tuple(match) for match in response["matches"]]
+
+    def stats(self) -> dict:
+        return self.call("stats")["stats"]
+
+
+def serve(address: str):
+    """Один процесс с моделью и индексами банка отвечает всем процессам action-сервера."""
+    # Сам сервис ищет локально, а не через себя же
+    os.environ["QUIZ_RETRIEVAL_SERVICE"] = ""
+    from actions.retrieval import engine
+
+    counters = {"requests": 0, "errors": 0}
+    lock = threading.Lock()
+
+    # Та же стратегия, те же индексы и кэш ответов, что и у действий в одном процессе
+    def search(text: str, k: int, method: str):
+        strategy = engine.get_strategy(method)
+        if k == 1:
+            qa, score, found_method = engine.find_similar_question(text, strategy)
+            return [(qa["question"], score, found_method)]
+        bank = engine.BANK.current
+        return [(bank.texts[match.index], match.score, match.method) for match in strategy.search(bank, text, k)]
+
+    def handle(request: dict) -> dict:
+        op = request.get("op")
+        if op == "search":
+            return {"matches": search(request["text"], int(request.get("k", 1)), request.get("method", "hybrid"))}
+        if op == "search_batch":
+            strategy = engine.get_strategy(request.get("method", "hybrid"))
+            found = sorted(engine.find_similar_questions_batch(request["texts"], strategy), key=lambda item: item[0])
+            return {"matches": [(qa["question"], score, method) for _, qa, score, method in found]}
+        if op == "options":
+            return {"matches": engine.find_similar_option_semantic(request["correct"], request["user"])}
+        if op == "stats":
+            return {"stats": {**counters, "bank": engine.BANK.current.digest, "pid": os.getpid()}}
+        raise ValueError(f"Unknown op {op!r}")
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                try:
+                    response = {"ok": True, **handle(json.loads(line))}
+                    with lock:
+                        counters["requests"] += 1
+                except Exception as error:
+                    response = {"ok": False, "error": f"{type(error).__name__}: {error}"}
+                    with lock:
+                        counters["errors"] += 1
+                self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+                self.wfile.flush()
+
+    family, target = parse_address(address)
+    if family == socket.AF_UNIX:
+        if os.path.exists(target):
+            os.remove(target)  # Сокет от прошлого запуска
+        server_class = _UnixServer
+    else:
+        server_class = _TCPServer
+
+    # Модель и индексы — до приёма соединений, чтобы первый клиент не ждал загрузки
+    engine.BANK.current.retriever()
+    engine.BANK.current.option_index()
+    with server_class(target, Handler) as server:
+        print(f"✅ Retrieval service listening on {address}", flush=True)
+        server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared retrieval service for the quiz action server")
+    parser.add_argument("--address", default="unix:/tmp/quiz-retrieval.sock",
+                        help="unix:/path/to.sock or host:port (use 127.0.0.1)")
+    args = parser.parse_args()
+    serve(args.address)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import os
+
+import yaml
+
+# Настройки action-сервера. Значение берётся из переменной окружения QUIZ_<ИМЯ>, иначе из ключа <имя>
+# раздела retrieval: файла QUIZ_CONFIG_PATH (по умолчанию endpoints.yml), иначе — значение по умолчанию ниже
+
+CONFIG_PATH = os.environ.get("QUIZ_CONFIG_PATH", "endpoints.yml")
+
+
+def _load_section(path: str, section: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return (yaml.safe_load(f) or {}).get(section) or {}
+    except FileNotFoundError:
+        return {}
+
+
+_CONFIG = _load_section(CONFIG_PATH, "retrieval")
+
+
+def _setting(name: str, default: str) -> str:
+    value = os.environ.get(f"QUIZ_{name}")
+    if value is not None:
+        return value
+    value = _CONFIG.get(name.lower())
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return "1" if value else "0"  # true/false в YAML для флагов вида QUIZ_X=1
+    return str(value)
+
+QUESTIONS_PATH = _setting("QUESTIONS_PATH", "scripts/questions.json")
+MODEL_NAME = _setting("MODEL_NAME", "all-MiniLM-L6-v2")
+
+# Стратегия поиска вопроса (actions.retrieval.strategies): fuzz, semantic или hybrid.
+# Все стратегии работают с одними индексами и кэшами снимка банка, смена стратегии — только настройка
+STRATEGY = _setting("STRATEGY", "hybrid")
+
+# Гибридный поиск: префильтр по символьным n-граммам отбирает кандидатов,
+# fuzzy и semantic переранжируют только их
+PREFILTER_CANDIDATES = int(_setting("PREFILTER_CANDIDATES", "50"))
+PREFILTER_NGRAM = int(_setting("PREFILTER_NGRAM", "3"))
+
+# Способ объединения оценок: cascade (ранний выход, см. ниже), rrf (reciprocal-rank fusion),
+# weighted (взвешенная сумма), max (как раньше)
+FUSION_METHOD = _setting("FUSION_METHOD", "cascade")
+RRF_K = int(_setting("RRF_K", "60"))
+FUZZ_WEIGHT = float(_setting("FUZZ_WEIGHT", "0.5"))
+
+# Каскад: этап отвечает сам, если лучшая оценка не ниже порога и отрыв от второго кандидата не меньше margin.
+# Пороги подбираются по benchmarks/bench_retrieval.py --methods rrf cascade (top-1 не ниже, чем у rrf)
+CASCADE_FUZZ_THRESHOLD = float(_setting("CASCADE_FUZZ_THRESHOLD", "0.9"))
+CASCADE_FUZZ_MARGIN = float(_setting("CASCADE_FUZZ_MARGIN", "0.1"))
+CASCADE_SEMANTIC_THRESHOLD = float(_setting("CASCADE_SEMANTIC_THRESHOLD", "0.8"))
+CASCADE_SEMANTIC_MARGIN = float(_setting("CASCADE_SEMANTIC_MARGIN", "0.05"))
+# Последний этап каскада — кросс-энкодер по RERANK_TOP лучшим (например, cross-encoder/ms-marco-MiniLM-L-6-v2);
+# пусто — без него, ответ по RRF
+CROSS_ENCODER = _setting("CROSS_ENCODER", "")
+RERANK_TOP = int(_setting("RERANK_TOP", "5"))
+# Он же переранжирует top-RERANK_TOP чисто семантического поиска, но только если первый кандидат
+# опережает второго меньше чем на RERANK_MARGIN: при уверенном bi-encoder'е лишней задержки нет
+RERANK_MARGIN = float(_setting("RERANK_MARGIN", "0.05"))
+# Приведение оценок кросс-энкодера к 0-1, одно на модель: auto — по активации модели, sigmoid или none
+RERANK_ACTIVATION = _setting("RERANK_ACTIVATION", "auto")
+
+# Пороги вариантов из lib/actions: fuzzy (rapidfuzz) и косинусная схожесть (sentence-transformers)
+LIB_FUZZ_THRESHOLD = float(_setting("LIB_FUZZ_THRESHOLD", "0.8"))
+LIB_SEMANTIC_THRESHOLD = float(_setting("LIB_SEMANTIC_THRESHOLD", "0.75"))
+
+# Кэш эмбеддингов запросов и найденных ответов: размер, время жизни (сек)
+# и необязательный файл sqlite, который переживает перезапуск action-сервера
+CACHE_SIZE = int(_setting("CACHE_SIZE", "1024"))
+CACHE_TTL = float(_setting("CACHE_TTL", "3600"))
+CACHE_PATH = _setting("CACHE_PATH", "")
+
+# Бэкенд модели: torch, onnx или onnx-int8 (квантизованная модель для CPU)
+MODEL_BACKEND = _setting("MODEL_BACKEND", "torch")
+ONNX_INT8_FILE = _setting("ONNX_INT8_FILE", "onnx/model_qint8_avx512_vnni.onnx")
+# Загружать модель и индексы в фоне сразу при старте action-сервера (иначе — при первом запросе)
+MODEL_WARMUP = _setting("MODEL_WARMUP", "1") == "1"
+
+# Поиск по всему банку эмбеддингов: exact (точный проход NumPy), ivf (кластеры NumPy)
+# или hnsw (hnswlib; без него используется ivf)
+VECTOR_INDEX = _setting("VECTOR_INDEX", "exact")
+IVF_NLIST = int(_setting("IVF_NLIST", "256"))
+IVF_NPROBE = int(_setting("IVF_NPROBE", "16"))
+HNSW_M = int(_setting("HNSW_M", "16"))
+HNSW_EF = int(_setting("HNSW_EF", "64"))
+
+# Асинхронные действия: потоки для модели, процессы для fuzzy (0 — те же потоки),
+# предел задач в работе и таймаут, после которого отвечаем только по fuzzy
+INFERENCE_THREADS = int(_setting("INFERENCE_THREADS", "4"))
+FUZZY_PROCESSES = int(_setting("FUZZY_PROCESSES", "0"))
+MAX_PENDING = int(_setting("MAX_PENDING", "32"))
+REQUEST_TIMEOUT = float(_setting("REQUEST_TIMEOUT", "2.0"))
+# Вставленный целиком экзамен (action_answer_batch): REQUEST_TIMEOUT плюс столько секунд на каждый вопрос
+BATCH_QUESTION_TIMEOUT = float(_setting("BATCH_QUESTION_TIMEOUT", "0.25"))
+
+# Склейка одновременных запросов на кодирование в один батч модели: окно ожидания (мс; 0 — без ожидания,
+# батч из накопившихся запросов) и максимальный размер батча. QUIZ_BATCH_ENCODER=0 отключает склейку
+BATCH_ENCODER = _setting("BATCH_ENCODER", "1") == "1"
+BATCH_WINDOW_MS = float(_setting("BATCH_WINDOW_MS", "0"))
+BATCH_MAX_SIZE = int(_setting("BATCH_MAX_SIZE", "64"))
+
+# Банк вопросов в компактном mmap-файле (questions.store рядом с questions.json), общем для всех процессов;
+# QUIZ_QUESTION_STORE=0 — прежний список словарей из json.load
+QUESTION_STORE = _setting("QUESTION_STORE", "1") == "1"
+
+# Как часто (секунды) проверять mtime questions.json и перезагружать банк без перезапуска сервера; 0 — не следить
+BANK_RELOAD_INTERVAL = float(_setting("BANK_RELOAD_INTERVAL", "2"))
+
+# Метрики Prometheus: порт локального /metrics (0 — не поднимать), доля запросов с профилем
+# (0.0-1.0), профилировщик cprofile или pyinstrument и каталог для профилей
+METRICS_PORT = int(_setting("METRICS_PORT", "0"))
+METRICS_HOST = _setting("METRICS_HOST", "127.0.0.1")
+PROFILE_RATE = float(_setting("PROFILE_RATE", "0"))
+PROFILER = _setting("PROFILER", "cprofile")
+PROFILE_DIR = _setting("PROFILE_DIR", ".cache/profiles")
+
+# Общий сервис поиска (python -m actions.retrieval_service): "unix:/tmp/quiz-retrieval.sock" или "127.0.0.1:8765".
+# Если задан, процессы action-сервера не загружают свою модель и эмбеддинги, а спрашивают сервис
+RETRIEVAL_SERVICE = _setting("RETRIEVAL_SERVICE", "")
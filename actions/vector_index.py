@@ -0,0 +1,238 @@
+import copy
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from actions.embedding_index import top_k
+
+
+class VectorIndex:
+    """
+    Индекс нормированных векторов с поиском по скалярному произведению.
+
+    Идентификаторы — целые числа (позиции вопросов в банке); add/remove
+    позволяют обновлять индекс при правке отдельных вопросов без пересборки.
+    Индекс снимка банка после сборки не меняется: перезагрузка правит
+    копию (copy), а прошлый снимок продолжает искать по своему.
+    """
+
+    def copy(self) -> "VectorIndex":
+        raise NotImplementedError
+
+    def add(self, ids: Sequence[int], vectors: np.ndarray):
+        raise NotImplementedError
+
+    def remove(self, ids: Sequence[int]):
+        raise NotImplementedError
+
+    def search(self, query: np.ndarray, k: int = 1) -> List[Tuple[int, float]]:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class BruteForceIndex(VectorIndex):
+    """Точный поиск: один матрично-векторный проход по всем векторам."""
+
+    def __init__(self, dim: int):
+        self._vectors = np.empty((0, dim), dtype=np.float32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._rows: Dict[int, int] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def copy(self) -> "BruteForceIndex":
+        clone = BruteForceIndex(self._vectors.shape[1])
+        clone._vectors = self._vectors[:self._size].copy()
+        clone._ids = self._ids[:self._size].copy()
+        clone._rows = dict(self._rows)
+        clone._size = self._size
+        return clone
+
+    def add(self, ids: Sequence[int], vectors: np.ndarray):
+        self.remove([i for i in ids if i in self._rows])
+        vectors = np.asarray(vectors, dtype=np.float32)
+        needed = self._size + len(ids)
+        if needed > len(self._vectors):
+            # Ёмкость растёт удвоением, чтобы поштучные добавления оставались амортизированно O(1)
+            capacity = max(needed, 2 * len(self._vectors), 16)
+            vectors_buf = np.empty((capacity, self._vectors.shape[1]), dtype=np.float32)
+            ids_buf = np.empty(capacity, dtype=np.int64)
+            vectors_buf[:self._size] = self._vectors[:self._size]
+            ids_buf[:self._size] = self._ids[:self._size]
+            self._vectors, self._ids = vectors_buf, ids_buf
+        for offset, (idx, vector) in enumerate(zip(ids, vectors)):
+            row = self._size + offset
+            self._vectors[row] = vector
+            self._ids[row] = idx
+            self._rows[int(idx)] = row
+        self._size = needed
+
+    def remove(self, ids: Sequence[int]):
+        # Удаление переносом последней строки на место удаляемой
+        for idx in ids:
+            row = self._rows.pop(int(idx), None)
+            if row is None:
+                continue
+            last = self._size - 1
+            if row != last:
+                self._vectors[row] = self._vectors[last]
+                self._ids[row] = self._ids[last]
+                self._rows[int(self._ids[row])] = row
+            self._size = last
+
+    def search(self, query: np.ndarray, k: int = 1) -> List[Tuple[int, float]]:
+        scores = self._vectors[:self._size] @ query
+        return [(int(self._ids[row]), score) for row, score in top_k(scores, k)]
+
+
+class IVFIndex(VectorIndex):
+    """
+    Inverted file на чистом NumPy: векторы разбиты по кластерам k-means,
+    запрос просматривает только `nprobe` ближайших кластеров.
+    """
+
+    def __init__(self, dim: int, nlist: int = 256, nprobe: int = 16, seed: int = 0):
+        self.dim = dim
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.seed = seed
+        self.centroids = None
+        self._lists: List[BruteForceIndex] = []
+        self._where: Dict[int, int] = {}
+        self._shared = set()  # кластеры, общие с индексом, из которого сделана копия
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def copy(self) -> "IVFIndex":
+        # Центроиды и кластеры общие; кластер копируется при первом изменении (copy-on-write)
+        clone = IVFIndex(self.dim, nlist=self.nlist, nprobe=self.nprobe, seed=self.seed)
+        clone.centroids = self.centroids
+        clone._lists = list(self._lists)
+        clone._where = dict(self._where)
+        clone._shared = set(range(len(self._lists)))
+        return clone
+
+    def _own(self, cluster: int) -> BruteForceIndex:
+        if cluster in self._shared:
+            self._lists[cluster] = self._lists[cluster].copy()
+            self._shared.discard(cluster)
+        return self._lists[cluster]
+
+    def train(self, vectors: np.ndarray, iterations: int = 10):
+        rng = np.random.default_rng(self.seed)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        nlist = max(1, min(self.nlist, len(vectors)))
+        centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            for cluster in range(nlist):
+                members = vectors[assignment == cluster]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[cluster] = centroid / max(np.linalg.norm(centroid), 1e-12)
+        self.centroids = centroids
+        self._lists = [BruteForceIndex(self.dim) for _ in range(nlist)]
+        self._shared = set()
+
+    def add(self, ids: Sequence[int], vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.centroids is None:
+            self.train(vectors)
+        self.remove([i for i in ids if i in self._where])
+        assignment = np.argmax(vectors @ self.centroids.T, axis=1)
+        for cluster in np.unique(assignment):
+            members = np.flatnonzero(assignment == cluster)
+            self._own(cluster).add([ids[m] for m in members], vectors[members])
+            for m in members:
+                self._where[int(ids[m])] = int(cluster)
+
+    def remove(self, ids: Sequence[int]):
+        for idx in ids:
+            cluster = self._where.pop(int(idx), None)
+            if cluster is not None:
+                self._own(cluster).remove([idx])
+
+    def search(self, query: np.ndarray, k: int = 1) -> List[Tuple[int, float]]:
+        if self.centroids is None:
+            return []
+        probes = [cluster for cluster, _ in top_k(self.centroids @ query, self.nprobe)]
+        found = [match for cluster in probes for match in self._lists[cluster].search(query, k)]
+        found.sort(key=lambda match: match[1], reverse=True)
+        return found[:k]
+
+
+class HnswIndex(VectorIndex):
+    """Граф HNSW из hnswlib (скалярное произведение); удаление — пометкой, повторное добавление снимает её."""
+
+    def __init__(self, dim: int, m: int = 16, ef_construction: int = 200, ef: int = 64):
+        import hnswlib
+
+        self.ef = ef
+        self._index = hnswlib.Index(space="ip", dim=dim)
+        self._index.init_index(max_elements=1024, M=m, ef_construction=ef_construction)
+        self._index.set_ef(ef)
+        self._ids = set()
+        self._deleted = set()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def copy(self) -> "HnswIndex":
+        # Граф копируется целиком (hnswlib поддерживает copy через pickle) — это memcpy, а не построение заново
+        clone = object.__new__(HnswIndex)
+        clone.ef = self.ef
+        clone._index = copy.deepcopy(self._index)
+        clone._index.set_ef(self.ef)
+        clone._ids = set(self._ids)
+        clone._deleted = set(self._deleted)
+        return clone
+
+    def add(self, ids: Sequence[int], vectors: np.ndarray):
+        needed = self._index.get_current_count() + len(ids)
+        if needed > self._index.get_max_elements():
+            self._index.resize_index(max(needed, 2 * self._index.get_max_elements()))
+        for idx in ids:
+            if int(idx) in self._deleted:
+                self._index.unmark_deleted(int(idx))
+                self._deleted.discard(int(idx))
+        # Для существующих меток hnswlib обновляет вектор на месте
+        self._index.add_items(np.asarray(vectors, dtype=np.float32), np.asarray(ids))
+        self._ids.update(int(i) for i in ids)
+
+    def remove(self, ids: Sequence[int]):
+        for idx in ids:
+            if int(idx) in self._ids:
+                self._index.mark_deleted(int(idx))
+                self._ids.discard(int(idx))
+                self._deleted.add(int(idx))
+
+    def search(self, query: np.ndarray, k: int = 1) -> List[Tuple[int, float]]:
+        k = min(k, len(self._ids))
+        if k <= 0:
+            return []
+        self._index.set_ef(max(self.ef, k))
+        labels, distances = self._index.knn_query(np.asarray(query, dtype=np.float32), k=k)
+        # Для space="ip" hnswlib возвращает 1 - <q, v>
+        return [(int(label), float(1.0 - distance)) for label, distance in zip(labels[0], distances[0])]
+
+
+VECTOR_INDEX_KINDS = ("exact", "ivf", "hnsw")
+
+
+def make_vector_index(kind: str, dim: int, **params) -> VectorIndex:
+    """Создаёт бэкенд по имени из настроек; hnsw без установленного hnswlib заменяется на ivf."""
+    if kind == "exact":
+        return BruteForceIndex(dim)
+    if kind == "hnsw":
+        try:
+            return HnswIndex(dim, m=params.get("m", 16), ef=params.get("ef", 64))
+        except ImportError:
+            kind = "ivf"
+    if kind == "ivf":
+        return IVFIndex(dim, nlist=params.get("nlist", 256), nprobe=params.get("nprobe", 16))
+    raise ValueError(f"Unknown vector index {kind!r}, expected one of {VECTOR_INDEX_KINDS}")
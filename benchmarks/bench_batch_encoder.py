@@ -0,0 +1,79 @@
+"""
+Benchmark: throughput vs latency of the micro-batching encoder.
+
+N client threads (concurrent quiz sessions) each encode a stream of bank
+questions. The baseline calls model.encode([text]) per request; the
+coalescer variants run through BatchEncoder with different waiting windows.
+
+Run from the repository root:
+
+    python benchmarks/bench_batch_encoder.py --clients 1 8 32 64 --windows 0 2 5
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from actions import settings
+from actions.batch_encoder import BatchEncoder
+from actions.embedding_index import encode_normalized
+from actions.model_registry import get_model
+
+
+def drive(encode, texts, clients, per_client):
+    latencies = []
+    lock = threading.Lock()
+
+    def client(offset):
+        local = []
+        for i in range(per_client):
+            text = texts[(offset * per_client + i) % len(texts)]
+            start = time.perf_counter()
+            encode(text)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    return len(latencies) / elapsed, float(np.percentile(latencies, 50)), float(np.percentile(latencies, 95))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 2, 5], help="batch windows, ms")
+    parser.add_argument("--per-client", type=int, default=20)
+    parser.add_argument("--max-batch", type=int, default=64)
+    args = parser.parse_args()
+
+    with open(settings.QUESTIONS_PATH, "r", encoding="utf-8") as file:
+        texts = [qa["question"] for qa in json.load(file)]
+    model = get_model()
+    encode_normalized(model, texts[:8])  # warm-up
+
+    print(f"{'clients':>7} {'mode':>12} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'mean batch':>10}")
+    for clients in args.clients:
+        rps, p50, p95 = drive(lambda text: encode_normalized(model, [text])[0], texts, clients, args.per_client)
+        print(f"{clients:>7} {'unbatched':>12} {rps:>8.1f} {p50:>8.1f} {p95:>8.1f} {1.0:>10.1f}")
+        for window in args.windows:
+            encoder = BatchEncoder(get_model, max_wait=window / 1000, max_batch=args.max_batch)
+            rps, p50, p95 = drive(encoder.encode, texts, clients, args.per_client)
+            print(f"{clients:>7} {f'window {window:g}ms':>12} {rps:>8.1f} {p50:>8.1f} {p95:>8.1f} "
+                  f"{encoder.stats()['mean_batch']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
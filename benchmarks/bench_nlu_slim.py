@@ -0,0 +1,101 @@
+"""
+Benchmark: `rasa train nlu` wall-clock and intent accuracy, full bank vs
+the slim training data of `generate_yml.py --slim`.
+
+For every setting the NLU file is generated into a temporary directory,
+the NLU model is trained with the repository config.yml, and
+`rasa test nlu` classifies a test set built from the whole bank: truncated,
+lower-cased questions (ask_question) and questions followed by their
+options (multiple_choice_question).
+
+Needs the rasa CLI. Run from the repository root:
+
+    python benchmarks/bench_nlu_slim.py --slim 0 100 200 --output nlu_slim.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = os.path.join(ROOT, "scripts")
+
+
+def write_test_set(path, questions):
+    ask, multiple = [], []
+    for q in questions:
+        words = q["question"].split()
+        ask.append(" ".join(words[:max(3, len(words) - 2)]).lower())
+        multiple.append(q["question"] + " " + " ; ".join(q["options"].values()))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("version: '3.1'\nnlu:\n")
+        for intent, examples in (("ask_question", ask), ("multiple_choice_question", multiple)):
+            f.write(f"  - intent: {intent}\n    examples: |\n")
+            f.writelines(f"      - {example.replace(chr(10), ' ').strip()}\n" for example in examples)
+
+
+def count_examples(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return sum(1 for line in f if line.startswith("      - "))
+
+
+def run_setting(slim, paraphrases, workdir, test_path):
+    data_dir = os.path.join(workdir, "data")
+    os.makedirs(data_dir, exist_ok=True)
+    nlu_path = os.path.join(data_dir, "nlu.yml")
+    subprocess.run(
+        [sys.executable, "generate_yml.py", "--nlu", nlu_path, "--slim", str(slim),
+         "--paraphrases", str(paraphrases), "--force"],
+        cwd=SCRIPTS, check=True, capture_output=True,
+    )
+
+    start = time.perf_counter()
+    subprocess.run(
+        ["rasa", "train", "nlu", "--config", os.path.join(ROOT, "config.yml"), "--nlu", data_dir,
+         "--out", os.path.join(workdir, "models"), "--fixed-model-name", "nlu"],
+        cwd=workdir, check=True, capture_output=True,
+    )
+    train_time = time.perf_counter() - start
+
+    results_dir = os.path.join(workdir, "results")
+    subprocess.run(
+        ["rasa", "test", "nlu", "--nlu", test_path, "--model", os.path.join(workdir, "models", "nlu.tar.gz"),
+         "--out", results_dir],
+        cwd=workdir, check=True, capture_output=True,
+    )
+    with open(os.path.join(results_dir, "intent_report.json"), "r", encoding="utf-8") as f:
+        accuracy = json.load(f)["accuracy"]
+
+    return {"slim": slim, "examples": count_examples(nlu_path), "train_s": train_time, "intent_accuracy": accuracy}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slim", type=int, nargs="+", default=[0, 100, 200], help="0 = full bank")
+    parser.add_argument("--paraphrases", type=int, default=2)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    with open(os.path.join(SCRIPTS, "questions.json"), "r", encoding="utf-8") as f:
+        questions = json.load(f)
+
+    results = []
+    print(f"{'slim':>6} {'examples':>9} {'train s':>8} {'accuracy':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_path = os.path.join(tmp, "test_nlu.yml")
+        write_test_set(test_path, questions)
+        for slim in args.slim:
+            result = run_setting(slim, args.paraphrases, os.path.join(tmp, f"slim_{slim}"), test_path)
+            results.append(result)
+            print(f"{slim or 'full':>6} {result['examples']:>9} {result['train_s']:>8.1f} {result['intent_accuracy']:>9.3f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: option-vs-answer matching in ActionAnswerMultipleChoice.
+
+Compares the old nested loop (two single-sentence encodes per user/correct
+option pair) with the batched find_similar_option_semantic for questions with
+4, 6 and 10 options, and checks that both return the same (correct, user, score)
+tuples.
+
+Run from the repository root:
+
+    python benchmarks/bench_option_similarity.py --repeat 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scipy.spatial.distance import cosine
+
+from actions.retrieval.engine import BANK, find_similar_option_semantic
+from actions.model_registry import get_model
+
+
+def legacy_find_similar_option_semantic(correct_options, user_options):
+    model = get_model()
+    result = []
+    for uqa in user_options:
+        similarities = []
+        for cqa in correct_options:
+            similarity = 1 - cosine(model.encode([uqa]).squeeze(), model.encode([cqa]).squeeze())
+            similarities.append((cqa, uqa, similarity))
+        similarities.sort(key=lambda x: x[2], reverse=True)
+        result.append(similarities[0])
+    return result
+
+
+def make_case(rng, n_options):
+    """
+    Takes a random bank entry and pads its options with options of other
+    entries up to n_options, the way a user pastes a longer question.
+    """
+    qa = rng.choice(BANK.current.qa)
+    correct_options = [qa["options"][key] for key in qa["answer"]]
+    user_options = list(qa["options"].values())
+    while len(user_options) < n_options:
+        other = rng.choice(BANK.current.qa)
+        user_options.append(rng.choice(list(other["options"].values())))
+    user_options = user_options[:n_options]
+    rng.shuffle(user_options)
+    return correct_options, user_options
+
+
+def timed(func, cases):
+    start = time.perf_counter()
+    results = [func(correct, user) for correct, user in cases]
+    return (time.perf_counter() - start) / len(cases), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="questions per option count")
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    BANK.current.option_index()  # load the model and the option index before timing
+    print(f"{'options':>8} {'legacy ms':>10} {'batched ms':>11} {'speedup':>8} {'same':>5}")
+    for n_options in (4, 6, 10):
+        cases = [make_case(rng, n_options) for _ in range(args.repeat)]
+        legacy_time, legacy = timed(legacy_find_similar_option_semantic, cases)
+        batched_time, batched = timed(find_similar_option_semantic, cases)
+
+        same = all(
+            old[0] == new[0] and old[1] == new[1] and abs(old[2] - new[2]) < 1e-4
+            for old_rows, new_rows in zip(legacy, batched)
+            for old, new in zip(old_rows, new_rows)
+        )
+        print(f"{n_options:>8} {legacy_time * 1000:>10.1f} {batched_time * 1000:>11.1f} "
+              f"{legacy_time / batched_time:>7.1f}x {str(same):>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: memory of the question bank as a list of dicts vs QuestionStore.
+
+Synthesizes banks of 1k, 10k and 100k questions from scripts/questions.json
+(question texts get a unique suffix, options and explanations are reused the
+way a real bank repeats them) and reports, for each representation:
+
+  * Python heap after loading (tracemalloc),
+  * bytes of the mmap'd store file (page cache, shared between worker processes),
+  * mean time of a full record read (question, options, answer, answers, explanation).
+
+Run from the repository root:
+
+    python benchmarks/bench_question_store.py --sizes 1000 10000 100000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from actions.question_store import QuestionStore, store_path
+
+
+def synthesize(bank, size, rng):
+    questions = []
+    for n in range(size):
+        qa = dict(rng.choice(bank))
+        qa["question"] = f"{qa['question']} #{n}"
+        questions.append(qa)
+    return questions
+
+
+def measure(load):
+    tracemalloc.start()
+    start = time.perf_counter()
+    data = load()
+    load_time = time.perf_counter() - start
+    heap = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return data, heap, load_time
+
+
+def read_time(data, rng, reads=2000):
+    indices = [rng.randrange(len(data)) for _ in range(reads)]
+    start = time.perf_counter()
+    for i in indices:
+        qa = data[i]
+        qa["question"], qa["options"], qa["answer"], qa["answers"], qa.get("explanation", "")
+    return (time.perf_counter() - start) / reads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bank", default="scripts/questions.json")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with open(args.bank, "r", encoding="utf-8") as f:
+        bank = json.load(f)
+
+    print(f"{'size':>7} {'dicts MB':>9} {'store heap KB':>14} {'store file MB':>14} "
+          f"{'dict read us':>13} {'store read us':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f"bank_{size}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(synthesize(bank, size, rng), f, ensure_ascii=False)
+            QuestionStore.load_or_build(path)  # build once, measure only loading
+
+            def load_dicts():
+                with open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+
+            dicts, dict_heap, _ = measure(load_dicts)
+            store, store_heap, _ = measure(lambda: QuestionStore.load_or_build(path))
+            file_size = os.path.getsize(store_path(path))
+
+            print(f"{size:>7} {dict_heap / 2**20:>9.1f} {store_heap / 2**10:>14.1f} {file_size / 2**20:>14.1f} "
+                  f"{read_time(dicts, rng) * 1e6:>13.2f} {read_time(store, rng) * 1e6:>14.2f}")
+            del dicts, store
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: scripts/quiz.py start-up and scheduling on large banks.
+
+Synthesizes a bank.txt of N questions from scripts/questions.txt (question
+texts get a unique suffix) and an answer history with M attempts, then
+reports:
+
+  * parsing the bank with the regex vs loading the compiled cache,
+  * loading one user's cards from the SQLite history,
+  * building the scheduler heap,
+  * mean time of next() + review() (one question asked and answered).
+
+Run from the repository root:
+
+    python benchmarks/bench_quiz.py --sizes 1000 10000 100000 --attempts 1000000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from quiz import AnswerHistory, Scheduler, load_questions, parse_questions, question_key
+
+
+def synthesize(source, path, size, rng):
+    blocks = [block for block in re.split(r"(?=Question\s+\d+:)", source) if block.strip()]
+    with open(path, "w", encoding="utf-8") as f:
+        for n in range(size):
+            header, _, body = rng.choice(blocks).partition(":")
+            # The unique suffix goes at the end of the first question line
+            first, _, rest = body.lstrip("\n").partition("\n")
+            f.write(f"Question {n + 1}:\n\n{first} #{n}\n{rest}")
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def fill_history(history, questions, attempts, rng):
+    # Attempts spread over the bank; cards keep only the latest state of each question
+    keys = [question_key(q) for q in questions]
+    now = time.time()
+    with history.db:
+        history.db.executemany(
+            "INSERT INTO attempts VALUES ('bench', ?, ?, ?, 1.0)",
+            ((rng.choice(keys), now - rng.random() * 90 * 86400, rng.random() < 0.7) for _ in range(attempts)))
+        history.db.executemany(
+            "INSERT OR REPLACE INTO cards VALUES ('bench', ?, 2, 6.0, 2.5, ?)",
+            ((key, now + rng.uniform(-30, 30) * 86400) for key in keys[:attempts]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default="scripts/questions.txt")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--attempts", type=int, default=1000000, help="attempts in the synthetic history")
+    parser.add_argument("--reviews", type=int, default=10000, help="next() + review() calls to time")
+    parser.add_argument("--seed", type=int, default=13)
+    args = parser.parse_args()
+
+    with open(args.source, "r", encoding="utf-8") as f:
+        source = f.read()
+
+    print(f"{'questions':>9} {'parse ms':>9} {'cached ms':>10} {'cards ms':>9} {'heap ms':>8} {'next+review us':>15}")
+    for size in args.sizes:
+        rng = random.Random(args.seed)
+        with tempfile.TemporaryDirectory() as tmp:
+            bank = os.path.join(tmp, "bank.txt")
+            synthesize(source, bank, size, rng)
+            cache_dir = os.path.join(tmp, "cache")
+
+            _, parse_time = timed(parse_questions, bank)
+            load_questions(bank, cache_dir)  # Builds the cache
+            questions, cached_time = timed(load_questions, bank, cache_dir)
+
+            history = AnswerHistory(os.path.join(tmp, "history.sqlite"))
+            fill_history(history, questions, args.attempts, rng)
+            cards, cards_time = timed(history.cards, "bench")
+            scheduler, heap_time = timed(Scheduler, questions, cards, rng=rng)
+
+            start = time.perf_counter()
+            for _ in range(args.reviews):
+                index = scheduler.next(due_only=False)
+                scheduler.review(index, rng.random() < 0.7)
+            review_time = (time.perf_counter() - start) / args.reviews
+            history.close()
+
+        print(f"{size:>9} {parse_time * 1000:>9.1f} {cached_time * 1000:>10.1f} {cards_time * 1000:>9.1f} "
+              f"{heap_time * 1000:>8.1f} {review_time * 1e6:>15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Benchmark: retrieval accuracy and latency under perturbed queries.
+
+Builds queries from scripts/questions.json with benchmarks/perturb.py
+(clean, typos, paraphrase, truncation, option_reorder) and measures top-1 /
+top-5 accuracy and per-query latency for:
+
+  semantic                   the semantic strategy of actions/retrieval (also lib/actions/sentence-transformers
+                             and lib/actions/all_question)
+  semantic-rerank            the same top-k reranked by a cross-encoder when the top two are close
+                             (--cross-encoder, --rerank-margin)
+  fuzz                       the fuzz strategy (also lib/actions/rapidfuzz)
+  hybrid                     the hybrid strategy: prefilter + fusion retriever as configured (QUIZ_FUSION_METHOD)
+  rrf                        the same retriever with reciprocal-rank fusion
+  cascade                    the same retriever as an early-exit cascade (exact, fuzz, semantic, rerank)
+
+A hit means the retrieved question is the source question after the
+exact-match normalization, so duplicates in the bank count as hits. For
+option_reorder the methods see only the first line, as
+ActionAnswerMultipleChoice does. Caches are off and the model is loaded
+offline, so runs are reproducible without network access.
+
+For the retriever methods the results also include "stages": the share of
+queries answered by each stage. For cascade, the exact and fuzz shares are
+queries that never ran the model. Tune QUIZ_CASCADE_* until cascade matches
+rrf on top-1 while skipping the model for as many queries as possible.
+For semantic-rerank they show how often the cross-encoder ran, and a
+summary compares its top-1 and p95 latency with plain semantic.
+
+Run from the repository root:
+
+    python benchmarks/bench_retrieval.py --queries 200 --output benchmarks/results/retrieval.json
+    python benchmarks/bench_retrieval.py --methods fuzz   # no model needed
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QUIZ_CACHE_SIZE", "0")
+os.environ.setdefault("QUIZ_MODEL_WARMUP", "0")
+os.environ.setdefault("QUIZ_BANK_RELOAD_INTERVAL", "0")
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+from actions.exact_match import normalize_question
+from benchmarks.perturb import PERTURBATIONS, make_queries
+
+K = 5
+
+
+def actions_methods(names, cross_encoder, rerank_margin):
+    from actions import settings
+    from actions.model_registry import get_cross_encoder
+    from actions.reranker import CrossEncoderReranker
+    from actions.retrieval import engine
+
+    bank = engine.BANK.current
+
+    def strategy_search(name):
+        strategy = engine.get_strategy(name)
+        return lambda query: [bank.texts[match.index] for match in strategy.search(bank, query, K)]
+
+    semantic = strategy_search("semantic")
+
+    def semantic_rerank():
+        reranker = CrossEncoderReranker(bank.texts, lambda: get_cross_encoder(cross_encoder),
+                                        activation=settings.RERANK_ACTIVATION)
+
+        def search(query):
+            if bank.exact.position(query) is not None:
+                search.stages["exact"] += 1
+                return semantic(query)
+            found = bank.question_index().search(engine.encode_query(query), K)
+            reranked = reranker.rerank(query, found, rerank_margin)
+            search.stages["rerank" if reranked is not found else "semantic"] += 1
+            return [bank.texts[i] for i, _ in reranked]
+
+        search.stages = Counter()
+        return search
+
+    def retriever_search(fusion=None):
+        retriever = bank.retriever()
+        if fusion is not None:
+            retriever = copy.copy(retriever)
+            retriever.fusion = fusion
+
+        def search(query):
+            # Top-1 through search(k=1), as the actions do, so the exact stage is included
+            matches = retriever.search(query, k=1)
+            search.stages[matches[0].method if matches else "none"] += 1
+            found = [m.index for m in matches]
+            found += [m.index for m in retriever.search(query, k=K) if m.index not in found]
+            return [bank.texts[i] for i in found[:K]]
+
+        search.stages = Counter()
+        return search
+
+    methods = {
+        "semantic": lambda: semantic,
+        "semantic-rerank": semantic_rerank,
+        "fuzz": lambda: strategy_search("fuzz"),
+        "hybrid": lambda: retriever_search(),
+        "rrf": lambda: retriever_search("rrf"),
+        "cascade": lambda: retriever_search("cascade"),
+    }
+    return {name: make() for name, make in methods.items() if name in names}
+
+
+def evaluate(method, queries, bank):
+    stages = getattr(method, "stages", None)
+    top1 = top5 = 0
+    latencies = []
+    for index, query in queries:
+        query = query.split("\n")[0]
+        start = time.perf_counter()
+        found = method(query)
+        latencies.append(time.perf_counter() - start)
+        target = normalize_question(bank[index]["question"])
+        hits = [normalize_question(text) == target for text in found]
+        top1 += bool(hits[:1] and hits[0])
+        top5 += any(hits[:K])
+    latencies = np.array(latencies) * 1000
+    result = {
+        "queries": len(queries),
+        "top1": top1 / len(queries),
+        "top5": top5 / len(queries),
+        "mean_ms": float(latencies.mean()),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+    if stages is not None:
+        result["stages"] = {stage: count / len(queries) for stage, count in stages.most_common()}
+        stages.clear()
+    return result
+
+
+def main():
+    all_methods = ["semantic", "semantic-rerank", "fuzz", "hybrid", "rrf", "cascade"]
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bank", default=os.path.join(ROOT, "scripts", "questions.json"))
+    parser.add_argument("--queries", type=int, default=200, help="queries per perturbation")
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--methods", nargs="+", default=all_methods, choices=all_methods)
+    parser.add_argument("--perturbations", nargs="+", default=list(PERTURBATIONS), choices=list(PERTURBATIONS))
+    parser.add_argument("--cross-encoder", default=os.environ.get("QUIZ_CROSS_ENCODER")
+                        or "cross-encoder/ms-marco-MiniLM-L-6-v2", help="model for semantic-rerank")
+    parser.add_argument("--rerank-margin", type=float, default=0.05,
+                        help="semantic-rerank skips the cross-encoder when top-1 leads top-2 by this much")
+    parser.add_argument("--output", default=os.path.join(ROOT, "benchmarks", "results", "retrieval.json"))
+    args = parser.parse_args()
+
+    with open(args.bank, "r", encoding="utf-8") as f:
+        bank = json.load(f)
+    queries = {name: make_queries(bank, name, args.queries, args.seed) for name in args.perturbations}
+
+    results = []
+    print(f"{'method':<26} {'perturbation':<15} {'top1':>6} {'top5':>6} {'p50 ms':>8} {'p95 ms':>8}")
+    os.environ.setdefault("QUIZ_QUESTIONS_PATH", args.bank)
+    methods = actions_methods(args.methods, args.cross_encoder, args.rerank_margin)
+    for name in args.methods:
+        for perturbation, perturbed in queries.items():
+            # Warm-up query so model and index loading are not counted as latency
+            methods[name](perturbed[0][1].split("\n")[0])
+            getattr(methods[name], "stages", Counter()).clear()
+            result = evaluate(methods[name], perturbed, bank)
+            results.append({"method": name, "perturbation": perturbation, **result})
+            stages = " ".join(f"{stage}={share:.2f}" for stage, share in result.get("stages", {}).items())
+            print(f"{name:<26} {perturbation:<15} {result['top1']:>6.3f} {result['top5']:>6.3f} "
+                  f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f}  {stages}")
+
+    # What the rerank stage buys and costs, per perturbation
+    by_key = {(result["method"], result["perturbation"]): result for result in results}
+    for perturbation in args.perturbations:
+        base, reranked = by_key.get(("semantic", perturbation)), by_key.get(("semantic-rerank", perturbation))
+        if base and reranked:
+            print(f"rerank {perturbation:<15} top1 {reranked['top1'] - base['top1']:+.3f}  "
+                  f"p95 {reranked['p95_ms'] - base['p95_ms']:+.2f} ms  "
+                  f"reranked {reranked['stages'].get('rerank', 0.0):.2f} of queries")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({
+            "bank": os.path.relpath(args.bank, ROOT),
+            "bank_size": len(bank),
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "results": results,
+        }, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
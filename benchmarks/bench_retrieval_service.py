@@ -0,0 +1,146 @@
+"""
+Benchmark: memory and throughput of N action-server processes, each with its
+own model and embeddings ("local") vs one shared retrieval service ("service",
+python -m actions.retrieval_service).
+
+For every worker count, N processes answer perturbed bank questions through
+actions.retrieval.engine.find_similar_question for --duration seconds. The script
+reports total requests per second and the memory of all processes
+involved, including the service. RSS counts pages shared through mmap once
+per process. PSS splits them between processes (Linux only), so the PSS
+total is the real footprint.
+
+Run from the repository root:
+
+    python benchmarks/bench_retrieval_service.py --workers 1 2 4 8 --duration 10 --output service.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.perturb import make_queries
+
+
+def memory(pid="self"):
+    # VmRSS from /proc/<pid>/status and Pss from smaps_rollup, in MB; None where unavailable
+    result = {"rss_mb": None, "pss_mb": None}
+    for path, field, key in ((f"/proc/{pid}/status", "VmRSS:", "rss_mb"),
+                             (f"/proc/{pid}/smaps_rollup", "Pss:", "pss_mb")):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith(field):
+                        result[key] = int(line.split()[1]) / 1024
+                        break
+        except OSError:
+            pass
+    return result
+
+
+def worker(address, queries, ready, duration, results):
+    os.environ["QUIZ_RETRIEVAL_SERVICE"] = address
+    os.environ["QUIZ_CACHE_SIZE"] = "0"
+    os.environ["QUIZ_MODEL_WARMUP"] = "0"
+    os.environ["QUIZ_BANK_RELOAD_INTERVAL"] = "0"
+    from actions.retrieval import engine
+
+    # Load everything this process needs, then start together with the other workers
+    engine.find_similar_question(queries[0])
+    ready.wait()
+    count = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        engine.find_similar_question(queries[count % len(queries)])
+        count += 1
+    results.put({"requests": count, **memory()})
+
+
+def start_service(address):
+    env = dict(os.environ, QUIZ_CACHE_SIZE="0", QUIZ_BANK_RELOAD_INTERVAL="0")
+    process = subprocess.Popen([sys.executable, "-m", "actions.retrieval_service", "--address", address],
+                               cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True)
+    process.stdout.readline()  # "Retrieval service listening on ..." once the model and indexes are loaded
+    return process
+
+
+def run(mode, workers, queries, duration):
+    context = multiprocessing.get_context("spawn")
+    service = None
+    address = ""
+    with tempfile.TemporaryDirectory() as tmp:
+        if mode == "service":
+            address = f"unix:{os.path.join(tmp, 'retrieval.sock')}"
+            service = start_service(address)
+        try:
+            ready, results = context.Barrier(workers), context.Queue()
+            processes = [context.Process(target=worker, args=(address, queries[i::workers], ready, duration, results))
+                         for i in range(workers)]
+            for process in processes:
+                process.start()
+            reports = [results.get() for _ in processes]
+            service_memory = memory(service.pid) if service else {"rss_mb": None, "pss_mb": None}
+            for process in processes:
+                process.join()
+        finally:
+            if service:
+                service.terminate()
+                service.wait()
+
+    def total(key):
+        values = [value for value in [report[key] for report in reports] + [service_memory[key]] if value is not None]
+        return sum(values) if values else None
+
+    return {
+        "mode": mode,
+        "workers": workers,
+        "throughput_rps": sum(report["requests"] for report in reports) / duration,
+        "rss_total_mb": total("rss_mb"),
+        "pss_total_mb": total("pss_mb"),
+        "worker_rss_mb": [report["rss_mb"] for report in reports],
+        "service_rss_mb": service_memory["rss_mb"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bank", default=os.path.join(ROOT, "scripts", "questions.json"))
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--modes", nargs="+", default=["local", "service"], choices=["local", "service"])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load per run")
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    with open(args.bank, "r", encoding="utf-8") as f:
+        bank = json.load(f)
+    rng = random.Random(args.seed)
+    queries = [query for perturbation in ("typos", "paraphrase", "truncation")
+               for _, query in make_queries(bank, perturbation, 200, args.seed)]
+    rng.shuffle(queries)
+
+    results = []
+    print(f"{'mode':<8} {'workers':>7} {'rps':>8} {'RSS total MB':>13} {'PSS total MB':>13}")
+    for mode in args.modes:
+        for workers in args.workers:
+            result = run(mode, workers, queries, args.duration)
+            results.append(result)
+            rss = f"{result['rss_total_mb']:.0f}" if result["rss_total_mb"] is not None else "n/a"
+            pss = f"{result['pss_total_mb']:.0f}" if result["pss_total_mb"] is not None else "n/a"
+            print(f"{mode:<8} {workers:>7} {result['throughput_rps']:>8.1f} {rss:>13} {pss:>13}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: action-server startup time and first-request latency.
+
+Each configuration runs in a fresh interpreter, so model loading, index
+loading and imports are measured cold:
+
+  import    - time to import actions.actions (what the action server waits
+              for before it can bind the port)
+  first     - latency of the first find_similar_question() call
+  second    - latency of a second, different query (steady state)
+
+Run from the repository root:
+
+    python benchmarks/bench_startup.py --backends torch onnx onnx-int8
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+import actions.actions
+from actions.retrieval import engine as A
+imported = time.perf_counter()
+A.find_similar_question("Who is responsible for ordering the Product Backlog items")
+first = time.perf_counter()
+A.find_similar_question("What happens when a Sprint is cancelled")
+second = time.perf_counter()
+print(json.dumps({"import": imported - start, "first": first - imported, "second": second - first}))
+"""
+
+
+def measure(backend, warmup):
+    env = dict(os.environ, QUIZ_MODEL_BACKEND=backend, QUIZ_MODEL_WARMUP="1" if warmup else "0")
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch"], choices=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes per configuration")
+    args = parser.parse_args()
+
+    print(f"{'backend':>10} {'warm-up':>8} {'import s':>9} {'first s':>8} {'second ms':>10}")
+    for backend in args.backends:
+        for warmup in (False, True):
+            runs = [measure(backend, warmup) for _ in range(args.runs)]
+            best = {key: min(run[key] for run in runs) for key in runs[0]}
+            print(f"{backend:>10} {str(warmup):>8} {best['import']:>9.2f} {best['first']:>8.2f} "
+                  f"{best['second'] * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark: recall@k and latency of the vector-index backends against the
+exact scan, for merged banks of 50k-100k questions.
+
+Real banks are far smaller, so the corpus is synthetic: normalized vectors
+drawn around cluster centres (questions on the same topic sit close
+together). Queries are perturbed copies of corpus vectors, like rephrased
+bank questions. With --bank the real question embeddings are tiled and
+perturbed up to the requested size instead.
+
+Run from the repository root:
+
+    python benchmarks/bench_vector_index.py --sizes 50000 100000 --k 5
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from actions.vector_index import make_vector_index
+
+
+def normalize(vectors):
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def synthetic_corpus(rng, size, dim, clusters=2000, spread=0.35):
+    centres = rng.normal(size=(clusters, dim))
+    labels = rng.integers(0, clusters, size)
+    return normalize(centres[labels] + spread * rng.normal(size=(size, dim)))
+
+
+def bank_corpus(rng, size, path):
+    base = np.load(path)
+    tiled = base[rng.integers(0, len(base), size)]
+    return normalize(tiled + 0.05 * rng.normal(size=tiled.shape))
+
+
+def run_backend(kind, corpus, queries, truth, k, params):
+    index = make_vector_index(kind, corpus.shape[1], **params)
+    start = time.perf_counter()
+    index.add(list(range(len(corpus))), corpus)
+    build = time.perf_counter() - start
+
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = index.search(query, k)
+        latencies.append(time.perf_counter() - start)
+        hits += len(expected & {idx for idx, _ in found})
+
+    # Incremental update: replace 1% of the vectors the way edited questions are re-embedded
+    changed = list(range(0, len(corpus), 100))
+    start = time.perf_counter()
+    index.remove(changed)
+    index.add(changed, corpus[changed])
+    update = time.perf_counter() - start
+
+    latencies = np.array(latencies) * 1000
+    return {
+        "backend": type(index).__name__,
+        "build_s": build,
+        "update_s": update,
+        "recall": hits / (len(queries) * k),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50000, 100000])
+    parser.add_argument("--dim", type=int, default=384, help="all-MiniLM-L6-v2 embedding size")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--bank", help="question embeddings .npy to tile instead of synthetic clusters, "
+                                       "e.g. scripts/questions.questions.npy")
+    parser.add_argument("--nlist", type=int, default=256)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--ef", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    params = {"nlist": args.nlist, "nprobe": args.nprobe, "ef": args.ef}
+    print(f"{'size':>7} {'backend':>16} {'build s':>8} {'update s':>9} {'recall@k':>9} {'p50 ms':>7} {'p95 ms':>7}")
+    for size in args.sizes:
+        corpus = bank_corpus(rng, size, args.bank) if args.bank else synthetic_corpus(rng, size, args.dim)
+        picked = rng.integers(0, size, args.queries)
+        queries = normalize(corpus[picked] + 0.02 * rng.normal(size=(args.queries, corpus.shape[1])))
+
+        # Ground truth from the exact scan
+        scores = queries @ corpus.T
+        truth = [set(np.argpartition(-row, args.k)[:args.k].tolist()) for row in scores]
+
+        for kind in ("exact", "ivf", "hnsw"):
+            result = run_backend(kind, corpus, queries, truth, args.k, params)
+            print(f"{size:>7} {result['backend']:>16} {result['build_s']:>8.2f} {result['update_s']:>9.3f} "
+                  f"{result['recall']:>9.3f} {result['p50_ms']:>7.2f} {result['p95_ms']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
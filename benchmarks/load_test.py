@@ -0,0 +1,120 @@
+"""
+Load test: concurrent quiz sessions against the async custom actions.
+
+Every session is an asyncio task that sends questions one after another
+straight into ActionAnswerQuestion.run / ActionAnswerMultipleChoice.run,
+the way the rasa_sdk action server awaits them. Queries are bank questions
+with light perturbations; the result cache is off by default so every
+request pays for retrieval.
+
+Reports p50/p95/p99 latency, throughput and how many answers degraded to
+the fuzzy-only fallback (timeout or back-pressure) at 1, 10 and 100
+concurrent sessions.
+
+Run from the repository root:
+
+    python benchmarks/load_test.py --requests 300
+    QUIZ_REQUEST_TIMEOUT=0.5 QUIZ_FUZZY_PROCESSES=2 python benchmarks/load_test.py
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QUIZ_CACHE_SIZE", "0")
+
+from rasa_sdk.executor import CollectingDispatcher
+
+from actions import actions
+from actions.retrieval import engine
+
+
+class StubTracker:
+    """Just enough of rasa_sdk.Tracker for the custom actions."""
+
+    def __init__(self, text):
+        self.latest_message = {"text": text, "intent": {}}
+
+
+def make_queries(rng, count):
+    queries = []
+    for _ in range(count):
+        qa = rng.choice(engine.BANK.current.qa)
+        words = qa["question"].split()
+        question = " ".join(words[:max(3, int(len(words) * rng.uniform(0.6, 1.0)))]).lower()
+        if rng.random() < 0.3 and qa["options"]:
+            options = list(qa["options"].values())
+            rng.shuffle(options)
+            queries.append(("multiple_choice", question + "\n" + "\n".join(options)))
+        else:
+            queries.append(("question", question))
+    return queries
+
+
+async def session(queries, latencies, methods):
+    question_action = actions.ActionAnswerQuestion()
+    choice_action = actions.ActionAnswerMultipleChoice()
+    for kind, text in queries:
+        dispatcher = CollectingDispatcher()
+        action = choice_action if kind == "multiple_choice" else question_action
+        start = time.perf_counter()
+        await action.run(dispatcher, StubTracker(text), {})
+        latencies.append(time.perf_counter() - start)
+        methods.append(dispatcher.messages[-1]["text"].split("\n")[0].split(",")[-1].strip())
+
+
+async def run_level(concurrency, queries):
+    latencies, methods = [], []
+    per_session = [queries[i::concurrency] for i in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(session(chunk, latencies, methods) for chunk in per_session))
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "fallbacks": methods.count("fuzz-fallback"),
+    }
+
+
+async def main_async(args):
+    rng = random.Random(args.seed)
+    # Warm up the model and indexes so the first level does not pay for loading
+    engine.BANK.current.retriever()
+    engine.BANK.current.option_index()
+
+    results = []
+    print(f"{'sessions':>8} {'requests':>8} {'rps':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'fallback':>8}")
+    for concurrency in args.concurrency:
+        result = await run_level(concurrency, make_queries(rng, max(args.requests, concurrency)))
+        result["pool"] = engine.INFERENCE_POOL.stats()
+        results.append(result)
+        print(f"{result['concurrency']:>8} {result['requests']:>8} {result['throughput_rps']:>7.1f} "
+              f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['fallbacks']:>8}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--requests", type=int, default=300, help="requests per concurrency level")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--seed", type=int, default=3)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
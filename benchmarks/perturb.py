@@ -0,0 +1,95 @@
+"""
+Deterministic query perturbations for the retrieval benchmarks.
+
+Every function takes a bank question (and a seeded random.Random) and
+returns what a user might type instead: a typo'd, paraphrased or truncated
+question, or a multiple-choice message with the options shuffled. No model
+or network is involved, so the same seed always gives the same queries.
+"""
+import random
+import re
+from typing import Callable, Dict, List, Tuple
+
+KEYBOARD_NEIGHBOURS = {
+    "a": "qwsz", "b": "vghn", "c": "xdfv", "d": "serfcx", "e": "wsdr", "f": "drtgvc", "g": "ftyhbv",
+    "h": "gyujnb", "i": "ujko", "j": "huikmn", "k": "jiolm", "l": "kop", "m": "njk", "n": "bhjm",
+    "o": "iklp", "p": "ol", "q": "wa", "r": "edft", "s": "awedxz", "t": "rfgy", "u": "yhji",
+    "v": "cfgb", "w": "qase", "x": "zsdc", "y": "tghu", "z": "asx",
+}
+
+# Scrum-specific rewrites a user is likely to make, plus generic question rewording
+SYNONYMS = [
+    (r"\bProduct Owner\b", "PO"),
+    (r"\bScrum Master\b", "SM"),
+    (r"\bDevelopment Team\b", "dev team"),
+    (r"\bDevelopers\b", "dev team"),
+    (r"\bProduct Backlog\b", "backlog"),
+    (r"\bSprint Backlog\b", "sprint plan"),
+    (r"\bDaily Scrum\b", "daily standup"),
+    (r"\bSprint Retrospective\b", "retro"),
+    (r"\bWhich of the following\b", "Which of these"),
+    (r"\bresponsible for\b", "accountable for"),
+    (r"\bis true\b", "is correct"),
+    (r"\bshould\b", "must"),
+]
+PREFIXES = ["", "Can you tell me: ", "Quick question - ", "I need help: ", "Scrum exam: "]
+STOPWORDS = {"the", "a", "an", "of", "to", "is", "are", "in"}
+
+
+def typos(text: str, rng: random.Random, rate: float = 0.05) -> str:
+    # Neighbouring-key substitution, dropped, doubled or swapped letters
+    chars = list(text)
+    i = 0
+    while i < len(chars):
+        if chars[i].isalpha() and rng.random() < rate:
+            kind = rng.randrange(4)
+            lower = chars[i].lower()
+            if kind == 0 and lower in KEYBOARD_NEIGHBOURS:
+                chars[i] = rng.choice(KEYBOARD_NEIGHBOURS[lower])
+            elif kind == 1:
+                del chars[i]
+                continue
+            elif kind == 2:
+                chars.insert(i, chars[i])
+                i += 1
+            elif i + 1 < len(chars):
+                chars[i], chars[i + 1] = chars[i + 1], chars[i]
+                i += 1
+        i += 1
+    return "".join(chars)
+
+
+def paraphrase(text: str, rng: random.Random) -> str:
+    for pattern, replacement in SYNONYMS:
+        if rng.random() < 0.7:
+            text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
+    words = [word for word in text.split() if word.lower() not in STOPWORDS or rng.random() < 0.5]
+    return rng.choice(PREFIXES) + " ".join(words).lower()
+
+
+def truncate(text: str, rng: random.Random, keep: Tuple[float, float] = (0.4, 0.7)) -> str:
+    words = text.split()
+    return " ".join(words[:max(3, int(len(words) * rng.uniform(*keep)))])
+
+
+def reorder_options(qa: Dict, rng: random.Random) -> str:
+    # The action_answer_multiple_choice message: the question, then the options shuffled
+    options = list(qa["options"].values())
+    rng.shuffle(options)
+    return qa["question"] + "\n" + "\n".join(options)
+
+
+PERTURBATIONS: Dict[str, Callable[[Dict, random.Random], str]] = {
+    "clean": lambda qa, rng: qa["question"],
+    "typos": lambda qa, rng: typos(qa["question"], rng),
+    "paraphrase": lambda qa, rng: paraphrase(qa["question"], rng),
+    "truncation": lambda qa, rng: truncate(qa["question"], rng),
+    "option_reorder": reorder_options,
+}
+
+
+def make_queries(bank: List[Dict], perturbation: str, count: int, seed: int) -> List[Tuple[int, str]]:
+    """(index of the source question in the bank, perturbed query) pairs."""
+    rng = random.Random(f"{seed}:{perturbation}")
+    indices = rng.sample(range(len(bank)), min(count, len(bank)))
+    return [(i, PERTURBATIONS[perturbation](bank[i], rng)) for i in indices]
@@ -0,0 +1,268 @@
+"""
+Replay / load generator: drive the running stack with traffic built from the bank.
+
+Traffic is built from scripts/questions.json: ask_question messages are
+bank questions, clean or perturbed (typos, paraphrase, truncation, see
+benchmarks/perturb.py). A share of them (--choice-share) are instead
+multiple_choice_question messages: the question followed by its shuffled
+options. The messages are sent open-loop at --rate requests per second, so
+a slow server builds a queue instead of slowing the generator down. Latency
+is measured from the scheduled send time, which includes that queueing.
+
+Targets (--targets), each measured separately:
+
+  nlu        POST {rasa}/model/parse              Rasa NLU only (DIET); also reports intent accuracy
+  rasa       POST {rasa}/webhooks/rest/webhook    the full stack: NLU, policies, action_endpoint, action
+  webhook    POST {action_endpoint}               the action server alone, with the tracker Rasa would send
+  inprocess  Action.run() with a stub tracker     action cost alone, without HTTP or NLU
+
+Start the servers first (rasa run --enable-api, rasa run actions); the
+action endpoint is read from endpoints.yml. Run from the repository root:
+
+    python benchmarks/replay.py --targets inprocess webhook --rate 20 --duration 30
+    python benchmarks/replay.py --targets nlu rasa --rate 5 --requests 200 --output replay.json
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.perturb import paraphrase, reorder_options, truncate, typos
+
+INTENT_ACTIONS = {
+    "ask_question": "action_answer_question",
+    "multiple_choice_question": "action_answer_multiple_choice",
+}
+QUESTION_VARIANTS = [lambda text, rng: text, typos, paraphrase, truncate]
+
+
+def make_traffic(bank, count, choice_share, seed):
+    """[(intent, message text)] in send order."""
+    rng = random.Random(seed)
+    traffic = []
+    for _ in range(count):
+        qa = rng.choice(bank)
+        if qa["options"] and rng.random() < choice_share:
+            traffic.append(("multiple_choice_question", reorder_options(qa, rng)))
+        else:
+            traffic.append(("ask_question", rng.choice(QUESTION_VARIANTS)(qa["question"], rng)))
+    return traffic
+
+
+def action_endpoint(path):
+    try:
+        import yaml
+
+        with open(path, "r", encoding="utf-8") as f:
+            return yaml.safe_load(f)["action_endpoint"]["url"]
+    except (ImportError, OSError, KeyError, TypeError):
+        return "http://localhost:5055/webhook"
+
+
+class JsonPoster:
+    """POST JSON over a keep-alive connection per thread; returns (status, decoded body or None)."""
+
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or (443 if parts.scheme == "https" else 80)
+        self.https = parts.scheme == "https"
+        self.path = parts.path or "/"
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            connection = self._local.connection = connection_class(self.host, self.port, timeout=self.timeout)
+        return connection
+
+    def post(self, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        connection = self._connection()
+        try:
+            connection.request("POST", self.path, body, {"Content-Type": "application/json"})
+            response = connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            self._local.connection = None
+            raise
+        try:
+            return response.status, json.loads(data) if data else None
+        except ValueError:
+            return response.status, None
+
+
+def nlu_target(rasa_url, timeout):
+    poster = JsonPoster(f"{rasa_url}/model/parse", timeout)
+
+    def send(n, intent, text):
+        status, body = poster.post({"text": text})
+        predicted = (body or {}).get("intent", {}).get("name")
+        return status == 200, predicted == intent
+
+    return send
+
+
+def rasa_target(rasa_url, timeout):
+    poster = JsonPoster(f"{rasa_url}/webhooks/rest/webhook", timeout)
+
+    def send(n, intent, text):
+        status, body = poster.post({"sender": f"replay-{n}", "message": text})
+        # An empty reply means the bot did not answer (fallback or a failed action)
+        return status == 200 and bool(body), None
+
+    return send
+
+
+def webhook_target(url, timeout):
+    poster = JsonPoster(url, timeout)
+
+    def send(n, intent, text):
+        # What Rasa sends to action_endpoint for the predicted action
+        status, body = poster.post({
+            "next_action": INTENT_ACTIONS[intent],
+            "sender_id": f"replay-{n}",
+            "version": "3.1",
+            "tracker": {
+                "sender_id": f"replay-{n}",
+                "slots": {},
+                "latest_message": {"text": text, "intent": {"name": intent, "confidence": 1.0}, "entities": []},
+                "events": [],
+                "paused": False,
+                "followup_action": None,
+                "active_loop": {},
+                "latest_action_name": "action_listen",
+            },
+            "domain": {},
+        })
+        return status == 200 and bool((body or {}).get("responses")), None
+
+    return send
+
+
+def inprocess_target():
+    from rasa_sdk.executor import CollectingDispatcher
+
+    from actions import actions
+    from actions.retrieval import engine
+    from benchmarks.load_test import StubTracker
+
+    handlers = {
+        "ask_question": actions.ActionAnswerQuestion(),
+        "multiple_choice_question": actions.ActionAnswerMultipleChoice(),
+    }
+    # Model and indexes loaded before the clock starts
+    engine.BANK.current.retriever()
+    engine.BANK.current.option_index()
+
+    async def send(n, intent, text):
+        dispatcher = CollectingDispatcher()
+        await handlers[intent].run(dispatcher, StubTracker(text), {})
+        return bool(dispatcher.messages), None
+
+    return send
+
+
+async def replay(send, traffic, rate, max_inflight, blocking):
+    """Open loop: request n is due at start + n / rate whatever happened to the earlier ones."""
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=max_inflight) if blocking else None
+    latencies, errors, checks = [], 0, []
+    start = time.perf_counter() + 0.1
+
+    async def one(n, intent, text):
+        nonlocal errors
+        scheduled = start + n / rate
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        try:
+            if blocking:
+                ok, check = await loop.run_in_executor(executor, send, n, intent, text)
+            else:
+                ok, check = await send(n, intent, text)
+        except Exception:
+            ok, check = False, None
+        latencies.append(time.perf_counter() - scheduled)
+        if not ok:
+            errors += 1
+        if check is not None:
+            checks.append(check)
+
+    await asyncio.gather(*(one(n, intent, text) for n, (intent, text) in enumerate(traffic)))
+    elapsed = time.perf_counter() - start
+    if executor:
+        executor.shutdown()
+
+    latencies = np.array(latencies) * 1000
+    result = {
+        "requests": len(traffic),
+        "target_rps": rate,
+        "throughput_rps": len(traffic) / elapsed,
+        "errors": errors,
+        "error_rate": errors / len(traffic),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+    if checks:
+        result["intent_accuracy"] = sum(checks) / len(checks)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", nargs="+", default=["inprocess"], choices=["nlu", "rasa", "webhook", "inprocess"])
+    parser.add_argument("--bank", default=os.path.join(ROOT, "scripts", "questions.json"))
+    parser.add_argument("--rasa-url", default="http://localhost:5005")
+    parser.add_argument("--action-url", default=action_endpoint(os.path.join(ROOT, "endpoints.yml")))
+    parser.add_argument("--rate", type=float, default=10.0, help="requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of traffic (ignored with --requests)")
+    parser.add_argument("--requests", type=int, help="number of requests per target")
+    parser.add_argument("--choice-share", type=float, default=0.3, help="share of multiple_choice_question messages")
+    parser.add_argument("--max-inflight", type=int, default=256, help="concurrent HTTP requests")
+    parser.add_argument("--timeout", type=float, default=30.0, help="HTTP timeout, seconds")
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    with open(args.bank, "r", encoding="utf-8") as f:
+        bank = json.load(f)
+    traffic = make_traffic(bank, args.requests or max(1, int(args.rate * args.duration)), args.choice_share, args.seed)
+
+    results = []
+    print(f"{'target':<10} {'requests':>8} {'rps':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'intent':>7}")
+    for target in args.targets:
+        if target == "inprocess":
+            send, blocking = inprocess_target(), False
+        elif target == "webhook":
+            send, blocking = webhook_target(args.action_url, args.timeout), True
+        elif target == "nlu":
+            send, blocking = nlu_target(args.rasa_url, args.timeout), True
+        else:
+            send, blocking = rasa_target(args.rasa_url, args.timeout), True
+        result = {"target": target, **asyncio.run(replay(send, traffic, args.rate, args.max_inflight, blocking))}
+        results.append(result)
+        intent = f"{result['intent_accuracy']:.3f}" if "intent_accuracy" in result else "-"
+        print(f"{target:<10} {result['requests']:>8} {result['throughput_rps']:>7.1f} {result['p50_ms']:>8.1f} "
+              f"{result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['error_rate']:>7.1%} {intent:>7}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"rate": args.rate, "seed": args.seed, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,24 @@
 from rasa_sdk import Action
-from rasa_sdk.events import SlotSet
-from rapidfuzz import process, fuzz  # Добавляем fuzzy-поиск
-import json
+
+from actions import settings
+from actions.retrieval import engine  # Общий банк, индексы и кэши с actions/actions.py
+
+# Только rapidfuzz, без модели: порог settings.LIB_FUZZ_THRESHOLD рассчитан на оценку fuzzy
+STRATEGY = engine.get_strategy("fuzz")
 
 class ActionAnswerQuestion(Action):
     def name(self):
         return "action_answer_question"
 
-    def run(self, dispatcher, tracker, domain):
+    async def run(self, dispatcher, tracker, domain):
         question = tracker.latest_message.get("text")  # Получаем сообщение пользователя
 
-        # Загружаем вопросы из JSON-файла
-        with open("questions.json", "r", encoding="utf-8") as f:
-            questions_db = json.load(f)
-
-        questions_list = list(questions_db.keys())  # Все вопросы из БД
-
-        # Ищем наиболее похожий вопрос (порог похожести - 80%)
-        best_match, score = process.extractOne(question, questions_list, scorer=fuzz.ratio)
+        # Ищем наиболее похожий вопрос в общем снимке банка (вопрос, вставленный дословно, — сразу по хэшу)
+        bank, match = await engine.match_question_async(question, STRATEGY)
 
-        if score >= 80:  # Если уверенность >= 80%, отвечаем
-            response = questions_db[best_match]
-            dispatcher.utter_message(text=f"✅ Best match: {best_match}")
+        if match.score >= settings.LIB_FUZZ_THRESHOLD:  # Если уверенность не ниже порога (по умолчанию 80%), отвечаем
+            response = bank.qa[match.index]
+            dispatcher.utter_message(text=f"✅ Best match: {response['question']}")
             dispatcher.utter_message(text=response["answers"])
             dispatcher.utter_message(text=response["explanation"])
         else:
@@ -0,0 +1,190 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+
+# Меняется при изменении логики разбора: тогда все блоки считаются изменёнными
+PARSER_VERSION = 1
+
+QUESTION_HEADER = re.compile(r'Question \d+:$')
+OPTION_LABELS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"  # Поддержка нескольких вариантов
+
+
+# Читаем исходник построчно и отдаём по одному блоку "Question N:" за раз
+def iter_question_blocks(file_path):
+    block = None
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if QUESTION_HEADER.match(line.rstrip('\n')):
+                if block is not None:
+                    yield ''.join(block)
+                block = []
+            elif block is not None:
+                block.append(line)
+    if block is not None:
+        yield ''.join(block)
+
+
+def block_hash(block):
+    return hashlib.sha1(f"{PARSER_VERSION}\n{block}".encode('utf-8')).hexdigest()
+
+
+# Стабильный ID: от текста вопроса, поэтому правка ответа или пояснения его не меняет
+def question_id(question_text):
+    normalized = re.sub(r'\W+', ' ', question_text.casefold()).strip()
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:12]
+
+
+# Разбор одного блока вопроса; None, если в блоке нет ответа
+def parse_question_block(block):
+    parts = re.split(r'\n\nAnswer: ', block)
+    if len(parts) < 2:
+        return None
+
+    question_and_options = parts[0].strip('\n').split('\n')
+    question_text = question_and_options[0].strip()
+    options = question_and_options[1:]
+
+    answer_expl = parts[1].split('\n\nExplanation\n')
+    answer_keys = [a.strip().rstrip('.') for a in answer_expl[0].split(',')]
+    explanation = answer_expl[1].strip() if len(answer_expl) > 1 else ""
+
+    variants = {}
+    idx_variant = 0
+    for option in options:
+        if len(option) < 1 or "(choose" in option or "All of the above" in option:
+            continue
+
+        variants[OPTION_LABELS[idx_variant]] = option.strip().rstrip('.')
+        idx_variant += 1
+
+    correct_answers = " and ".join(variants[ans] for ans in answer_keys)
+    correct_answers = "Yes" if correct_answers == "True" else "No" if correct_answers == "False" else correct_answers
+
+    if "____" in question_text:
+        correct_answers = re.sub(r'____.*', correct_answers, question_text)
+
+    question_text = re.sub(r' \(choose.*', '', question_text.strip())
+    question_text = re.sub(r'\? Choose.*', '?', question_text)
+    question_text = re.sub(r'\. Choose.*', '?', question_text)
+
+    return {
+        "question": question_text,
+        "options": variants,
+        "answer": answer_keys,
+        "answers": correct_answers,
+        "explanation": explanation
+    }
+
+
+# Записи прошлого прогона: hash блока -> запись и id -> hash блока
+def load_previous(jsonl_path):
+    by_hash, ids = {}, {}
+    if os.path.exists(jsonl_path):
+        with open(jsonl_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    by_hash[record["hash"]] = record
+                    ids[record["id"]] = record["hash"]
+    return by_hash, ids
+
+
+def compile_bank(source_path, jsonl_path, json_path=None, delta_path=None):
+    """
+    Потоково компилирует банк вопросов в JSON Lines (одна запись на строку, с id и hash).
+
+    Неизменившиеся блоки берутся из прошлого questions.jsonl без повторного разбора.
+    json_path — прежний questions.json для action-сервера (пишется потоково, тот же формат).
+    delta_path — список добавленных/изменённых/удалённых id для инкрементальной пересборки индексов.
+    """
+    previous, previous_ids = load_previous(jsonl_path)
+
+    seen_ids = {}
+    current_ids = set()
+    delta = {"added": [], "changed": [], "removed": [], "unchanged": 0}
+
+    jsonl_tmp = f"{jsonl_path}.tmp"
+    json_tmp = f"{json_path}.tmp" if json_path else None
+    with open(jsonl_tmp, 'w', encoding='utf-8') as jsonl_file, \
+            open(json_tmp or os.devnull, 'w', encoding='utf-8') as json_file:
+        json_file.write("[")
+        count = 0
+        for block in iter_question_blocks(source_path):
+            digest = block_hash(block)
+            cached = previous.get(digest)
+            if cached is not None:
+                record = {key: value for key, value in cached.items() if key not in ("id", "hash")}
+            else:
+                record = parse_question_block(block)
+                if record is None:
+                    continue
+
+            # Одинаковые вопросы в банке получают суффикс, чтобы ID оставались уникальными
+            base_id = question_id(record["question"])
+            seen_ids[base_id] = seen_ids.get(base_id, 0) + 1
+            record_id = base_id if seen_ids[base_id] == 1 else f"{base_id}-{seen_ids[base_id]}"
+            current_ids.add(record_id)
+
+            if record_id not in previous_ids:
+                delta["added"].append(record_id)
+            elif previous_ids[record_id] != digest:
+                delta["changed"].append(record_id)
+            else:
+                delta["unchanged"] += 1
+
+            jsonl_file.write(json.dumps({"id": record_id, "hash": digest, **record}, ensure_ascii=False) + "\n")
+
+            # Тот же вид, что даёт json.dump(..., indent=4) для всего списка
+            indented = json.dumps(record, indent=4, ensure_ascii=False).replace("\n", "\n    ")
+            json_file.write(("," if count else "") + "\n    " + indented)
+            count += 1
+        json_file.write("\n]" if count else "]")
+
+    delta["removed"] = [record_id for record_id in previous_ids if record_id not in current_ids]
+
+    os.replace(jsonl_tmp, jsonl_path)
+    if json_path:
+        os.replace(json_tmp, json_path)
+    if delta_path:
+        with open(delta_path, 'w', encoding='utf-8') as f:
+            json.dump(delta, f, indent=4)
+    return count, delta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile questions.txt into questions.jsonl / questions.json")
+    parser.add_argument("--source", default="questions.txt")
+    parser.add_argument("--jsonl", default="questions.jsonl")
+    parser.add_argument("--json", default="questions.json", help="legacy JSON array for the action server; '' to skip")
+    parser.add_argument("--delta", default="questions.delta.json", help="changed ids for downstream rebuilds")
+    parser.add_argument("--index", action="store_true",
+                        help="also build the action server's files next to --json: embedding indexes, "
+                             "question store and prebuilt responses (loads the model)")
+    args = parser.parse_args()
+
+    count, delta = compile_bank(args.source, args.jsonl, args.json or None, args.delta or None)
+    print(f"✅ Compiled {count} questions: {len(delta['added'])} added, {len(delta['changed'])} changed, "
+          f"{len(delta['removed'])} removed, {delta['unchanged']} unchanged")
+    if args.index and args.json:
+        build_index(args.json)
+
+
+# Индексы и готовые ответы action-сервера собираются при компиляции, а не при первом запросе
+def build_index(json_path):
+    os.environ["QUIZ_QUESTIONS_PATH"] = os.path.abspath(json_path)
+    os.environ.setdefault("QUIZ_BANK_RELOAD_INTERVAL", "0")
+    os.environ.setdefault("QUIZ_MODEL_WARMUP", "0")
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from actions.retrieval.engine import BANK
+
+    bank = BANK.current
+    bank.question_index()
+    bank.option_index()
+    print(f"✅ Indexed {len(bank.texts)} questions, {len(bank.responses())} prebuilt responses")
+
+
+if __name__ == "__main__":
+    main()
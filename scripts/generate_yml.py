@@ -1,126 +1,268 @@
+import argparse
+import glob
+import hashlib
 import json
-import yaml
-
-# Загружаем JSON с вопросами
-with open("questions.json", "r", encoding="utf-8") as f:
-    QUESTIONS_DB = json.load(f)
+import os
+from itertools import groupby
+from operator import itemgetter
 
 version_yml = "3.1"
 
-# Создаём структуру YAML для NLU
-nlu_data = {
-    "version": version_yml,
-    "nlu": [
-        { "intent": "ask_question", "examples" : [] },
-        { "intent": "multiple_choice_question", "examples" : [] },
-    ]
-}
-
-# Создаём структуру YAML для domain
-domain_data = {
-    "version": version_yml,
-    "intents": ["query_question"],
-    "responses": {},
-    "actions": ["action_answer_question"]
-}
-
-# Создаём структуру YAML для stories
-stories_data = {
-    "version": version_yml,
-    "stories": []
-}
-
-for index, q in enumerate(QUESTIONS_DB):
-    intent_name = f"question_{index}"
-    explanation_name = f"explanation_{index}"
-
-    # Формируем вариант ответа
-    options = [f"[{q['options'][opt]}](option)" for opt in q['options']]
-    nlu_option = " ; ".join(options)
-
-    nlu_data["nlu"][0]["examples"].append(f"- {q['question']}")
-    nlu_data["nlu"][1]["examples"].append(f"- [{q['question']}](question) {nlu_option}")
-
-    domain_data["intents"].append(intent_name)
-
-    # Формируем ответ
+# Меняется при изменении формата вывода: старая отметка тогда не совпадёт
+GENERATOR_VERSION = 3
+STAMP_PATH = ".generate_yml.stamp"
+BUFFER_SIZE = 1 << 20
+
+
+# Хэш входа: содержимое банка (и прочих входных файлов, например эмбеддингов для --slim) + параметры генерации
+def input_hash(input_paths, options):
+    digest = hashlib.sha256(f"{GENERATOR_VERSION}:{json.dumps(options, sort_keys=True)}".encode("utf-8"))
+    for path in input_paths:
+        digest.update(f"\0{path}\0".encode("utf-8"))
+        if not os.path.exists(path):
+            continue  # Необязательный вход (эмбеддинги): его появление тоже меняет хэш
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(BUFFER_SIZE), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_up_to_date(digest, outputs):
+    if not os.path.exists(STAMP_PATH) or not all(os.path.exists(path) for path in outputs):
+        return False
+    with open(STAMP_PATH, "r", encoding="utf-8") as f:
+        return f.read().strip() == digest
+
+
+def write_stamp(digest):
+    with open(STAMP_PATH, "w", encoding="utf-8") as f:
+        f.write(digest)
+
+
+# Строка для YAML: JSON-строка — корректный скаляр YAML в двойных кавычках
+def yaml_str(text):
+    return json.dumps(text, ensure_ascii=False)
+
+
+def example_line(text):
+    return "      {}\n".format(text.replace('\n', ' ').strip())
+
+
+# Примеры для интентов NLU; варианты ответа размечаются сущностью option
+def nlu_examples(questions):
+    ask, multiple = [], []
+    for q in questions:
+        options = [f"[{q['options'][opt]}](option)" for opt in q['options']]
+        nlu_option = " ; ".join(options)
+        ask.append(f"- {q['question']}")
+        multiple.append(f"- [{q['question']}](question) {nlu_option}")
+    return [("ask_question", ask), ("multiple_choice_question", multiple), ("batch_questions", batch_examples(questions))]
+
+
+# Вставленный целиком экзамен (action_answer_batch): по BATCH_SIZE соседних вопросов в формате scripts/quiz.py
+BATCH_SIZE = 3
+MAX_BATCH_EXAMPLES = 50
+
+
+def batch_examples(questions):
+    step = max(BATCH_SIZE, len(questions) // MAX_BATCH_EXAMPLES)
+    examples = []
+    for start in range(0, len(questions) - BATCH_SIZE + 1, step):
+        block = questions[start:start + BATCH_SIZE]
+        examples.append("- " + " ".join(f"Question {n}: {q['question']}" for n, q in enumerate(block, start=1)))
+    return examples
+
+
+# Шаблоны синтетических перефразировок для режима --slim
+PARAPHRASE_TEMPLATES = [
+    "What is the correct answer to: {question}",
+    "{question} (choose the best answer)",
+    "Help me with this Scrum question: {question}",
+    "Question: {question}",
+]
+
+
+# Векторы вопросов: готовый индекс action-сервера (questions.questions.npy), иначе хэшированные триграммы
+def question_vectors(questions, embeddings_path):
+    import numpy as np
+
+    if embeddings_path and os.path.exists(embeddings_path):
+        vectors = np.load(embeddings_path, mmap_mode="r")
+        if vectors.shape[0] == len(questions):
+            return np.asarray(vectors, dtype=np.float32)
+
+    vectors = np.zeros((len(questions), 1024), dtype=np.float32)
+    for row, q in enumerate(questions):
+        text = f" {' '.join(q['question'].casefold().split())} "
+        for i in range(len(text) - 2):
+            vectors[row, int(hashlib.md5(text[i:i + 3].encode("utf-8")).hexdigest()[:8], 16) % 1024] += 1
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+# Farthest-point sampling по косинусному расстоянию, затем каждый выбранный вопрос заменяется медоидом
+# своего кластера: подмножество покрывает всё пространство, но состоит из типичных, а не крайних вопросов
+def farthest_point_sample(vectors, count):
+    import numpy as np
+
+    count = min(count, len(vectors))
+    if count <= 0:
+        return []
+    centroid = vectors.mean(axis=0)
+    selected = [int(np.argmax(vectors @ centroid))]
+    distance = 1 - vectors @ vectors[selected[0]]
+    distance[selected[0]] = -1
+    for _ in range(count - 1):
+        candidate = int(np.argmax(distance))
+        selected.append(candidate)
+        distance = np.minimum(distance, 1 - vectors @ vectors[candidate])
+        distance[selected] = -1
+
+    assignment = np.argmax(vectors @ vectors[selected].T, axis=1)
+    medoids = set()
+    for cluster, centre in enumerate(selected):
+        members = np.flatnonzero(assignment == cluster)
+        if len(members) == 0:
+            medoids.add(centre)
+            continue
+        mean = vectors[members].mean(axis=0)
+        medoids.add(int(members[np.argmax(vectors[members] @ mean)]))
+    return sorted(medoids)
+
+
+# Небольшое разнообразное подмножество банка + синтетические перефразировки
+def slim_examples(questions, count, paraphrases, embeddings_path):
+    subset = [questions[i] for i in farthest_point_sample(question_vectors(questions, embeddings_path), count)]
+    intents = nlu_examples(subset)
+    ask = intents[0][1]
+    for n, q in enumerate(subset):
+        for k in range(paraphrases):
+            template = PARAPHRASE_TEMPLATES[(n + k) % len(PARAPHRASE_TEMPLATES)]
+            ask.append("- " + template.format(question=q["question"]))
+    return intents
+
+
+def shard_path(output, index):
+    if index == 0:
+        return output
+    base, ext = os.path.splitext(output)
+    return f"{base}_{index:03d}{ext}"
+
+
+# Разбивка примеров на шарды по shard_size штук (0 — один файл); внутри шарда примеры сгруппированы по интентам
+def shard_examples(intents, shard_size):
+    flat = [(intent, example) for intent, examples in intents for example in examples]
+    size = shard_size or max(len(flat), 1)
+    for start in range(0, max(len(flat), 1), size):
+        chunk = flat[start:start + size]
+        yield [(intent, [example for _, example in group]) for intent, group in groupby(chunk, key=itemgetter(0))]
+
+
+# Потоковая запись NLU: nlu.yml, при шардировании ещё nlu_001.yml, nlu_002.yml, ...
+def write_nlu(output, intents, shard_size=0):
+    written = []
+    for index, items in enumerate(shard_examples(intents, shard_size)):
+        path = shard_path(output, index)
+        with open(path, "w", encoding="utf-8", buffering=BUFFER_SIZE) as f:
+            f.write("version: '{}'\n".format(version_yml))
+            f.write("nlu:\n")
+            for intent, examples in items:
+                f.write("  - intent: {}\n".format(intent))
+                f.write("    examples: |\n")
+                f.writelines(example_line(example) for example in examples)
+        written.append(path)
+
+    # Шарды прошлого запуска, которых теперь нет, иначе rasa обучится на устаревших примерах
+    base, ext = os.path.splitext(output)
+    for stale in glob.glob(f"{base}_[0-9][0-9][0-9]{ext}"):
+        if stale not in written:
+            os.remove(stale)
+    return written
+
+
+# Одинаковые (после нормализации) вопросы получают один интент question_{index}
+def question_intents(questions):
+    seen = {}
+    for index, q in enumerate(questions):
+        key = " ".join(q["question"].casefold().split())
+        if key in seen:
+            continue
+        seen[key] = index
+        yield index, q
+
+
+def response_text(q):
     text_response = " ".join(q["answers"].split('\n'))
-    text_response = "Yes" if text_response == "True" else "No" if text_response == "False" else text_response
-    domain_data["responses"][f"utter_{intent_name}"] = [{"text": text_response}]
-    domain_data["actions"].append(f"utter_{intent_name}")
-
-    # Формируем story
-    stories_data["stories"].append({
-        "story": f"Answer Question {index}",
-        "steps": [
-            {"intent": intent_name},
-            {"action": f"utter_{intent_name}"}
-        ]
-    })
-
-# Записываем в nlu.yml
-def dict_to_yaml(data, indent=0):
-    yaml_str = ""
-    spaces = "  " * indent
-
-    if isinstance(data, dict):
-        for key, value in data.items():
-            yaml_str += f"{spaces}{key}:"
-            if isinstance(value, (dict, list)):
-                yaml_str += "\n" + dict_to_yaml(value, indent + 1)
-            else:
-                yaml_str += f" {value}\n"
-    elif isinstance(data, list):
-        for item in data:
-            yaml_str += f"{spaces}-"
-            if isinstance(item, (dict, list)):
-                yaml_str += "\n" + dict_to_yaml(item, indent + 1)
-            else:
-                yaml_str += f" {item}\n"
-
-    return yaml_str
-
-# Генерируем YAML вывод в нужном формате
-def generate_yaml(data):
-    result = "version: '{}'\n".format(data['version'])
-    result += "nlu:\n"
-
-    for item in data['nlu']:
-        result += "  - intent: {}\n".format(item["intent"])
-        result += "    examples: |\n"
-        for example in item["examples"]:
-            result += "      {}\n".format(example.replace('\n', ' ').strip())
-
-    # result += "domain:\n"
-    # result += "  version: '{}'\n".format(data['version'])
-    # result += "  intents:\n"
-    # for intent in domain_data["intents"]:
-    #     result += "    - {}\n".format(intent)
-
-    # result += "  responses:\n"
-    # for response in domain_data["responses"]:
-    #     result += "    utter_{}:\n".format(response.split('_')[1])
-    #     result += "      - text: {}\n".format(domain_data["responses"][response][0]["text"])
-
-    # result += "  actions:\n"
-    # for action in domain_data["actions"]:
-    #     result += "    - {}\n".format(action)
-
-    # result += "stories:\n"
-    # for story in stories_data["stories"]:
-    #     result += "  - story: {}\n".format(story["story"])
-    #     result += "    steps:\n"
-    #     for step in story["steps"]:
-    #         result += "      - intent: {}\n".format(step.get('intent', ''))
-    #         result += "      - action: {}\n".format(step.get('action', ''))
-
-    return result
-
-# Выводим результат в формате YAML
-yaml_output = generate_yaml({
-    'version': version_yml,
-    'nlu': nlu_data['nlu']
-})
-
-with open("../data/nlu.yml", "w", encoding="utf-8") as f:
-    f.write(yaml_output)
+    return "Yes" if text_response == "True" else "No" if text_response == "False" else text_response
+
+
+def write_domain(output, questions):
+    intents = list(question_intents(questions))
+    with open(output, "w", encoding="utf-8", buffering=BUFFER_SIZE) as f:
+        f.write("version: '{}'\n".format(version_yml))
+        f.write("intents:\n  - query_question\n")
+        f.writelines("  - question_{}\n".format(index) for index, _ in intents)
+        f.write("responses:\n")
+        for index, q in intents:
+            f.write("  utter_question_{}:\n".format(index))
+            f.write("    - text: {}\n".format(yaml_str(response_text(q))))
+        f.write("actions:\n  - action_answer_question\n")
+        f.writelines("  - utter_question_{}\n".format(index) for index, _ in intents)
+
+
+def write_stories(output, questions):
+    with open(output, "w", encoding="utf-8", buffering=BUFFER_SIZE) as f:
+        f.write("version: '{}'\n".format(version_yml))
+        f.write("stories:\n")
+        for index, _ in question_intents(questions):
+            f.write("  - story: Answer Question {}\n".format(index))
+            f.write("    steps:\n")
+            f.write("      - intent: question_{}\n".format(index))
+            f.write("      - action: utter_question_{}\n".format(index))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate Rasa NLU (and optionally domain/stories) from questions.json")
+    parser.add_argument("--questions", default="questions.json")
+    parser.add_argument("--nlu", default="../data/nlu.yml")
+    parser.add_argument("--domain", help="also write question_N intents and utter responses, e.g. ../domain_questions.yml")
+    parser.add_argument("--stories", help="also write question_N stories, e.g. ../data/stories_questions.yml")
+    parser.add_argument("--shard-size", type=int, default=0, help="max examples per NLU file, 0 = one file")
+    parser.add_argument("--slim", type=int, default=0,
+                        help="train on N representative questions (farthest-point sampling) instead of the whole bank")
+    parser.add_argument("--paraphrases", type=int, default=2, help="synthetic paraphrases per question in --slim mode")
+    parser.add_argument("--embeddings", default="questions.questions.npy",
+                        help="question embeddings for --slim; falls back to character trigrams")
+    parser.add_argument("--force", action="store_true", help="regenerate even if the input is unchanged")
+    args = parser.parse_args()
+
+    outputs = [path for path in (args.nlu, args.domain, args.stories) if path]
+    # В режиме --slim выборка вопросов зависит и от файла эмбеддингов
+    inputs = [args.questions] + ([args.embeddings] if args.slim and args.embeddings else [])
+    digest = input_hash(inputs, {"outputs": outputs, "shard_size": args.shard_size,
+                                 "slim": args.slim, "paraphrases": args.paraphrases})
+    if not args.force and is_up_to_date(digest, outputs):
+        print("✅ Inputs unchanged, YAML is up to date")
+        return
+
+    # Загружаем JSON с вопросами
+    with open(args.questions, "r", encoding="utf-8") as f:
+        questions = json.load(f)
+
+    if args.slim:
+        intents = slim_examples(questions, args.slim, args.paraphrases, args.embeddings)
+    else:
+        intents = nlu_examples(questions)
+    written = write_nlu(args.nlu, intents, args.shard_size)
+    if args.domain:
+        write_domain(args.domain, questions)
+        written.append(args.domain)
+    if args.stories:
+        write_stories(args.stories, questions)
+        written.append(args.stories)
+
+    write_stamp(digest)
+    print(f"✅ Written {', '.join(written)}")
+
+
+if __name__ == "__main__":
+    main()
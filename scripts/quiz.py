@@ -1,5 +1,13 @@
+import argparse
+import gc
+import getpass
+import hashlib
+import heapq
+import marshal
+import os
 import re
 import random
+import sqlite3
 import time
 
 # Colors
@@ -11,6 +19,12 @@ INCORRECT_COLOR = "\033[91m"    # light red
 EXPLANATION_COLOR = "\033[95m"  # light purple
 DEFAULT_COLOR = "\033[97m"      # light white
 
+# Compiled bank cache: bumped when the parsed format changes, so old caches are rebuilt
+CACHE_VERSION = 1
+CACHE_DIR = ".cache"
+HISTORY_PATH = os.path.join(CACHE_DIR, "quiz_history.sqlite")
+DAY = 24 * 3600
+
 def format_time(seconds):
     """
     Convert seconds to a formatted string: X hours, Y minutes, Z.ZZ seconds.
@@ -22,7 +36,14 @@ def format_time(seconds):
 
 def parse_questions(filename):
     """
-    Reads and parses the question bank from a file.
+    Reads and parses the question bank from a file (see parse_questions_text).
+    """
+    with open(filename, encoding='utf-8') as f:
+        return parse_questions_text(f.read())
+
+def parse_questions_text(content):
+    """
+    Parses questions from text: a bank file or a whole exam pasted into the chat.
     Expected structure for each question block:
     
       Question <number>:
@@ -38,11 +59,13 @@ def parse_questions(filename):
     then all paragraphs except the last one are part of the question text,
     and the last paragraph is considered as the answer options.
     Otherwise, fallback to previous logic.
+    A pasted exam usually has no "Answer:" line; then 'answer' is an empty string.
+    "Explanation" is only recognised after "Answer:" and at the start of a line,
+    so a question that mentions the word is not cut at it.
     """
-    with open(filename, encoding='utf-8') as f:
-        content = f.read()
-
-    pattern = r"Question\s+\d+:\s*(.*?)\s*Answer:\s*(.*?)(?:\s*Explanation\s*(.*?))?(?=Question\s+\d+:|$)"
+    pattern = (r"Question\s+\d+:\s*(.*?)"
+               r"(?:\s*Answer:[ \t]*(.*?)(?:\s*\n[ \t]*Explanation\b\s*(.*?))?)?"
+               r"(?=Question\s+\d+:|$)")
     matches = re.findall(pattern, content, re.DOTALL | re.IGNORECASE)
 
     questions = []
@@ -78,6 +101,177 @@ def parse_questions(filename):
         })
     return questions
 
+def load_questions(filename, cache_dir=CACHE_DIR):
+    """
+    Parses the bank once and keeps the result in <cache_dir>/<bank name>.marshal,
+    keyed by the SHA-256 of the bank file. Later launches load the cache in
+    milliseconds; any edit of the bank changes the hash and the bank is re-parsed.
+    """
+    with open(filename, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    cache_path = os.path.join(cache_dir, os.path.basename(filename) + ".marshal")
+    try:
+        with open(cache_path, "rb") as f:
+            data = f.read()
+        # One read + marshal.loads (marshal.load on a file reads it in small chunks);
+        # no GC passes while hundreds of thousands of small objects are created
+        gc.disable()
+        try:
+            cached = marshal.loads(data)
+        finally:
+            gc.enable()
+        if cached.get("version") == CACHE_VERSION and cached.get("digest") == digest:
+            return cached["questions"]
+    except (OSError, EOFError, ValueError, TypeError, AttributeError):
+        pass
+
+    questions = parse_questions_text(raw.decode("utf-8"))
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        marshal.dump({"version": CACHE_VERSION, "digest": digest, "questions": questions}, f)
+    os.replace(tmp_path, cache_path)
+    return questions
+
+def question_key(question):
+    """
+    Stable key of a question for the answer history: the hash of its normalized text,
+    so reordering or renumbering the bank keeps the progress.
+    """
+    return hashlib.sha1(" ".join(question["question"].casefold().split()).encode("utf-8")).hexdigest()
+
+class AnswerHistory:
+    """
+    Per-user answer history in a local SQLite file.
+
+    'attempts' keeps every answer; 'cards' keeps only the current schedule
+    state of each (user, question), so loading a user's progress reads one
+    row per question however many attempts there were.
+    """
+
+    def __init__(self, path=HISTORY_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS attempts (
+                user TEXT NOT NULL, question TEXT NOT NULL, answered_at REAL NOT NULL,
+                correct INTEGER NOT NULL, seconds REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS attempts_by_question ON attempts (user, question);
+            CREATE TABLE IF NOT EXISTS cards (
+                user TEXT NOT NULL, question TEXT NOT NULL,
+                repetitions INTEGER NOT NULL, interval REAL NOT NULL, ease REAL NOT NULL, due REAL NOT NULL,
+                PRIMARY KEY (user, question)
+            ) WITHOUT ROWID;
+        """)
+
+    def cards(self, user):
+        """{question key: card} for one user; a card is (repetitions, interval in days, ease, due timestamp)."""
+        rows = self.db.execute("SELECT question, repetitions, interval, ease, due FROM cards WHERE user = ?", (user,))
+        return {key: tuple(card) for key, *card in rows}
+
+    def record(self, user, key, correct, seconds, card, answered_at=None):
+        answered_at = time.time() if answered_at is None else answered_at
+        with self.db:
+            self.db.execute("INSERT INTO attempts VALUES (?, ?, ?, ?, ?)", (user, key, answered_at, int(correct), seconds))
+            self.db.execute("INSERT OR REPLACE INTO cards VALUES (?, ?, ?, ?, ?, ?)", (user, key, *card))
+
+    def stats(self, user):
+        attempts, correct = self.db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(correct), 0) FROM attempts WHERE user = ?", (user,)).fetchone()
+        return {"attempts": attempts, "correct": correct, "cards": len(self.cards(user))}
+
+    def close(self):
+        self.db.close()
+
+NEW_CARD = (0, 0.0, 2.5, 0.0)
+# Leitner box intervals in days; a card's box is its number of correct answers in a row
+LEITNER_INTERVALS = [0, 1, 3, 7, 14, 30, 60]
+# A wrongly answered question comes back in the same session after this many seconds
+RELEARN_SECONDS = 60
+
+def sm2(card, correct, now):
+    """
+    SM-2: the interval grows by the ease factor after each correct answer (1, 6, then
+    interval * ease days); a wrong answer starts the card over and lowers its ease.
+    """
+    repetitions, interval, ease, _ = card
+    quality = 4 if correct else 1
+    ease = max(1.3, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    if not correct:
+        return 0, 0.0, ease, now + RELEARN_SECONDS
+    interval = 1.0 if repetitions == 0 else 6.0 if repetitions == 1 else interval * ease
+    return repetitions + 1, interval, ease, now + interval * DAY
+
+def leitner(card, correct, now):
+    """
+    Leitner boxes: a correct answer moves the card one box up, a wrong one back to the first box.
+    """
+    repetitions, _, ease, _ = card
+    if not correct:
+        return 0, 0.0, ease, now + RELEARN_SECONDS
+    box = min(repetitions + 1, len(LEITNER_INTERVALS) - 1)
+    return box, float(LEITNER_INTERVALS[box]), ease, now + LEITNER_INTERVALS[box] * DAY
+
+SCHEDULERS = {"sm2": sm2, "leitner": leitner}
+
+class Scheduler:
+    """
+    Picks the next question to ask: the one due earliest.
+
+    All questions sit in one heap ordered by due time; new questions are due
+    immediately, in random order. Taking the next question and putting it
+    back after an answer are O(log n), so this stays fast for banks of 100k
+    questions. A question is in the heap at most once: it is popped when
+    asked and pushed again by review().
+    """
+
+    def __init__(self, questions, cards, algorithm="sm2", rng=None):
+        rng = rng or random.Random()
+        self.questions = questions
+        self.keys = [question_key(q) for q in questions]
+        self.cards = [cards.get(key, NEW_CARD) for key in self.keys]
+        self.update = SCHEDULERS[algorithm]
+        self._heap = [(card[3], rng.random(), i) for i, card in enumerate(self.cards)]
+        heapq.heapify(self._heap)
+        self._tick = 0
+        self.current = None
+
+    def __len__(self):
+        return len(self._heap)
+
+    def next(self, now=None, due_only=True):
+        """Index of the next question, or None when nothing is due (or the heap is empty)."""
+        now = time.time() if now is None else now
+        if not self._heap or (due_only and self._heap[0][0] > now):
+            return None
+        return heapq.heappop(self._heap)[2]
+
+    def review(self, index, correct, now=None):
+        """Updates the card after an answer and puts the question back; returns the new card."""
+        now = time.time() if now is None else now
+        card = self.update(self.cards[index], correct, now)
+        self.cards[index] = card
+        # Ties (the same due time) are broken by answer order
+        self._tick += 1
+        heapq.heappush(self._heap, (card[3], self._tick, index))
+        return card
+
+    def session(self, due_only=True):
+        """
+        Yields the questions in the order to ask them; `current` is the index of
+        the last one yielded. Answers go to review() before the next question is taken.
+        """
+        while True:
+            index = self.next(due_only=due_only)
+            if index is None:
+                return
+            self.current = index
+            yield self.questions[index]
+
 def normalize_answer(answer):
     """
     Normalize an answer string: remove dots and commas,
@@ -86,13 +280,15 @@ def normalize_answer(answer):
     answer = answer.replace('.', '').replace(',', ' ')
     return set(answer.upper().split())
 
-def quiz(questions, colors):
+def quiz(questions, colors, on_answer=None):
     """
     Runs the quiz by displaying each question along with its options,
     accepting user input, checking the answer, and showing the result
     along with the explanation (if available).
     If the user enters 'exit', the quiz terminates immediately and results are displayed.
     Additionally, it shows the time spent on each question and the cumulative test time.
+    on_answer(question, correct, seconds) is called after every answer
+    (the spaced-repetition mode records it and reschedules the question).
     """
     score = 0
     attempted = 0
@@ -130,6 +326,9 @@ def quiz(questions, colors):
         else:
             print(colors["incorrect"] + "\n❌ Incorrect.\n" + RESET)
             print(colors["incorrect"] + f"Correct answer: {q['answer']}\n" + RESET)
+
+        if on_answer:
+            on_answer(q, user_set == correct_set, question_time)
         
         if q['explanation']:
             explanation_clean = "\n".join([line for line in q['explanation'].splitlines() if line.strip()])
@@ -145,7 +344,16 @@ def quiz(questions, colors):
     print(colors["default"] + f"Correct {score} out of {attempted} questions ({percentage:.2f}% correct)" + RESET)
 
 def main():
-    questions = parse_questions("bank.txt")
+    parser = argparse.ArgumentParser(description="Scrum quiz from a Question N: / Answer: bank file")
+    parser.add_argument("--bank", default="bank.txt")
+    parser.add_argument("--user", default=getpass.getuser(), help="whose answer history to use")
+    parser.add_argument("--history", default=HISTORY_PATH, help="SQLite file with the answer history")
+    parser.add_argument("--scheduler", default="sm2", choices=sorted(SCHEDULERS))
+    parser.add_argument("--all", action="store_true",
+                        help="spaced repetition: keep going after the due questions (study ahead)")
+    args = parser.parse_args()
+
+    questions = load_questions(args.bank)
     
     # Color scheme
     use_color = input("Use color scheme? (yes/no, default yes): ").strip().lower()
@@ -172,17 +380,42 @@ def main():
         print(colors["incorrect"] + "Failed to parse questions from the file" + RESET)
         return
 
-    choice = input(colors["default"] + "Random question order? (yes/no, default yes): ")
-    print(RESET, end="")
-    choice = choice.strip().lower()
-    if choice in ("", "yes", "y"):
-        random.shuffle(questions)
+    # The old yes/no answers still work: yes = random order, no = bank order
+    orders = {"": "s", "s": "s", "r": "r", "b": "b", "yes": "r", "y": "r", "no": "b", "n": "b"}
+    while True:
+        choice = input(colors["default"] + "Question order: spaced repetition, random or as in the bank? "
+                                           "(s/r/b, default s): ")
+        print(RESET, end="")
+        choice = orders.get(choice.strip().lower())
+        if choice is not None:
+            break
+        print(colors["incorrect"] + "Please enter s, r or b" + RESET)
 
     print(colors["default"] + f"\nTotal questions in the bank: {len(questions)}" + RESET)
     print(colors["default"] + "Answer input format: a/a,b,c" + RESET)
     print(colors["default"] + "Enter 'exit' to finish" + RESET)
-    
-    quiz(questions, colors)
+
+    if choice != "s":
+        if choice == "r":
+            random.shuffle(questions)
+        quiz(questions, colors)
+        return
+
+    # Spaced repetition: due questions first (new ones count as due), progress is kept per user
+    history = AnswerHistory(args.history)
+    try:
+        scheduler = Scheduler(questions, history.cards(args.user), args.scheduler)
+
+        def on_answer(q, correct, seconds):
+            card = scheduler.review(scheduler.current, correct)
+            history.record(args.user, scheduler.keys[scheduler.current], correct, seconds, card)
+
+        quiz(scheduler.session(due_only=not args.all), colors, on_answer)
+        stats = history.stats(args.user)
+        print(colors["default"] + f"History of {args.user}: {stats['attempts']} answers, "
+              f"{stats['correct']} correct, {stats['cards']} questions seen" + RESET)
+    finally:
+        history.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
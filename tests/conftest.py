@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Tests import the repository packages the way the action server does (actions.*, scripts.*)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
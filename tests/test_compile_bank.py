@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+
+from scripts.compile_bank import compile_bank, question_id
+
+SOURCE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "questions.txt")
+
+BLOCKS = {
+    "backlog": "Question {n}:\n\nWho orders the Product Backlog?\n\nA. The Product Owner\nB. The Developers\n\n"
+               "Answer: A\n\nExplanation\nThe Product Owner is accountable for it.\n\n",
+    "sprint": "Question {n}:\n\nWhat is the maximum length of a Sprint?\n\nA. One month\nB. Two months\n\n"
+              "Answer: A\n\nExplanation\nSprints are one month or less.\n\n",
+    "review": "Question {n}:\n\nWho attends the Sprint Review?\n\nA. The Scrum Team\nB. Stakeholders\n"
+              "C. Nobody\n\nAnswer: A, B\n\nExplanation\nThe Scrum Team and stakeholders.\n\n",
+}
+
+
+def write_source(path, blocks):
+    path.write_text("".join(block.format(n=n) for n, block in enumerate(blocks, 1)), encoding="utf-8")
+
+
+def run(tmp_path, blocks):
+    source = tmp_path / "questions.txt"
+    write_source(source, blocks)
+    return compile_bank(str(source), str(tmp_path / "questions.jsonl"), str(tmp_path / "questions.json"))
+
+
+def ids(*questions):
+    return [question_id(question) for question in questions]
+
+
+def test_compile_edit_recompile_delta(tmp_path):
+    count, delta = run(tmp_path, [BLOCKS["backlog"], BLOCKS["sprint"]])
+    assert count == 2
+    assert delta == {"added": ids("Who orders the Product Backlog?", "What is the maximum length of a Sprint?"),
+                     "changed": [], "removed": [], "unchanged": 0}
+
+    count, delta = run(tmp_path, [BLOCKS["backlog"], BLOCKS["sprint"]])
+    assert delta == {"added": [], "changed": [], "removed": [], "unchanged": 2}
+
+    # Правка ответа меняет hash блока, но не id; новый блок добавлен, "sprint" удалён
+    edited = BLOCKS["backlog"].replace("Answer: A", "Answer: B")
+    count, delta = run(tmp_path, [edited, BLOCKS["review"]])
+    assert count == 2
+    assert delta == {"added": ids("Who attends the Sprint Review?"),
+                     "changed": ids("Who orders the Product Backlog?"),
+                     "removed": ids("What is the maximum length of a Sprint?"),
+                     "unchanged": 0}
+
+    questions = json.loads((tmp_path / "questions.json").read_text(encoding="utf-8"))
+    assert [q["answer"] for q in questions] == [["B"], ["A", "B"]]
+    assert questions[0]["answers"] == "B. The Developers"
+    assert questions[1]["answers"] == "A. The Scrum Team and B. Stakeholders"
+
+
+def test_incremental_output_matches_a_clean_compile(tmp_path):
+    incremental, clean = tmp_path / "incremental", tmp_path / "clean"
+    incremental.mkdir()
+    clean.mkdir()
+    run(incremental, [BLOCKS["backlog"], BLOCKS["sprint"]])
+    run(incremental, [BLOCKS["sprint"], BLOCKS["review"], BLOCKS["backlog"]])
+    run(clean, [BLOCKS["sprint"], BLOCKS["review"], BLOCKS["backlog"]])
+    for name in ("questions.json", "questions.jsonl"):
+        assert (incremental / name).read_bytes() == (clean / name).read_bytes()
+
+
+def test_bundled_bank_recompiles_unchanged(tmp_path):
+    source = tmp_path / "questions.txt"
+    shutil.copy(SOURCE_PATH, source)
+    jsonl, json_path = str(tmp_path / "questions.jsonl"), str(tmp_path / "questions.json")
+    count, delta = compile_bank(str(source), jsonl, json_path)
+    with open(json_path, encoding="utf-8") as f:
+        first = f.read()
+    assert count == len(json.loads(first)) == len(delta["added"]) > 0
+
+    count_again, delta = compile_bank(str(source), jsonl, json_path, str(tmp_path / "delta.json"))
+    assert count_again == count
+    assert delta == {"added": [], "changed": [], "removed": [], "unchanged": count}
+    with open(json_path, encoding="utf-8") as f:
+        assert f.read() == first
+    assert json.loads((tmp_path / "delta.json").read_text(encoding="utf-8")) == delta
@@ -0,0 +1,10 @@
+from actions.exact_match import ExactMatchIndex
+
+
+def test_empty_normalized_keys_never_match():
+    index = ExactMatchIndex(["Who orders the Product Backlog?", "?"])
+    for text in ["", "?", "??", "!!!", "🙂"]:
+        assert index.lookup(text) is None
+        assert index.position(text) is None
+    assert index.lookup("who orders the product backlog") == 0
+    assert index.stats()["hits"] == 1
@@ -0,0 +1,14 @@
+from actions.prefilter import NgramIndex
+
+TEXTS = ["Who orders the Product Backlog?", "What is the maximum length of a Sprint?", "Who attends the Sprint Review?"]
+
+
+def test_candidates_share_an_ngram_with_the_query():
+    index = NgramIndex(TEXTS)
+    found = index.candidates("sprint length", 5)
+    assert found and all(score > 0 for _, score in found)
+    assert found[0][0] == 1
+
+
+def test_no_overlap_gives_no_candidates():
+    assert NgramIndex(TEXTS).candidates("zzzz qqqq", 5) == []
@@ -0,0 +1,65 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from actions.question_store import QuestionStore, store_path
+
+BANK_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "questions.json")
+
+
+@pytest.fixture
+def bank(tmp_path):
+    path = tmp_path / "questions.json"
+    shutil.copy(BANK_PATH, path)
+    with open(path, encoding="utf-8") as f:
+        return str(path), json.load(f)
+
+
+def test_round_trip_matches_questions_json(bank):
+    path, questions = bank
+    store = QuestionStore.load_or_build(path)
+    assert len(store) == len(questions)
+    for record, expected in zip(store, questions):
+        assert record.to_dict() == expected
+        # Порядок меток в "answer" — как в JSON, а не по алфавиту
+        assert record["answer"] == expected["answer"]
+
+
+def test_answer_order_and_missing_explanation(tmp_path):
+    questions = [
+        {"question": "Pick two", "options": {"A": "x", "B": "y", "C": "z"}, "answer": ["C", "A"], "answers": "C, A"},
+        {"question": "Pick one", "options": {"A": "x", "B": "y"}, "answer": ["B"], "answers": "B",
+         "explanation": "Because."},
+    ]
+    path = tmp_path / "bank.json"
+    path.write_text(json.dumps(questions), encoding="utf-8")
+    store = QuestionStore.load_or_build(str(path))
+    assert store[0]["answer"] == ["C", "A"]
+    # Как у dict из JSON: без ключа — значение по умолчанию, а не пустая строка
+    assert store[0].get("explanation", "Explanation not found.") == "Explanation not found."
+    assert [record.to_dict() for record in store] == questions
+
+
+def test_rebuilt_only_when_the_bank_changes(bank):
+    path, questions = bank
+    QuestionStore.load_or_build(path)
+    built = os.path.getmtime(store_path(path))
+    os.utime(store_path(path), (built - 10, built - 10))
+    assert QuestionStore.load_or_build(path)[0]["question"] == questions[0]["question"]
+    assert os.path.getmtime(store_path(path)) == built - 10
+
+    questions[0]["answer"] = ["B", "A"]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(questions, f)
+    assert QuestionStore.load_or_build(path)[0]["answer"] == ["B", "A"]
+    assert not [name for name in os.listdir(os.path.dirname(path)) if name.endswith(".tmp")]
+
+
+def test_rejects_answers_outside_the_options(tmp_path):
+    path = tmp_path / "bank.json"
+    path.write_text(json.dumps([{"question": "q", "options": {"A": "x"}, "answer": ["B"], "answers": "B"}]),
+                    encoding="utf-8")
+    with pytest.raises(ValueError):
+        QuestionStore.load_or_build(str(path))
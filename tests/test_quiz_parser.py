@@ -0,0 +1,98 @@
+import os
+
+from scripts.quiz import parse_questions, parse_questions_text
+
+BANK_BLOCK = """Question 1:
+
+Which explanation of the Sprint Review is correct?
+
+A. x
+B. y
+
+Answer: A
+
+Explanation
+Because.
+"""
+
+
+def test_question_mentioning_explanation_is_not_cut():
+    assert parse_questions_text(BANK_BLOCK) == [{
+        "question": "Which explanation of the Sprint Review is correct?",
+        "options": ["A. x", "B. y"],
+        "answer": "A",
+        "explanation": "Because.",
+    }]
+
+
+def test_bank_blocks():
+    content = BANK_BLOCK + """
+Question 2:
+
+Who orders the Product Backlog?
+
+A. The Product Owner
+B. The Developers
+
+Answer: A
+
+Explanation
+
+The Product Owner is accountable for it.
+
+Question 3:
+
+True or False. Scrum is a framework.
+
+True
+False
+
+Answer:
+
+
+
+Explanation
+
+It is.
+"""
+    questions = parse_questions_text(content)
+    assert [q["question"] for q in questions] == [
+        "Which explanation of the Sprint Review is correct?",
+        "Who orders the Product Backlog?",
+        "True or False. Scrum is a framework.",
+    ]
+    assert questions[1]["options"] == ["A. The Product Owner", "B. The Developers"]
+    assert questions[1]["explanation"] == "The Product Owner is accountable for it."
+    # An empty "Answer:" must not swallow the newline before "Explanation"
+    assert questions[2]["answer"] == ""
+    assert questions[2]["explanation"] == "It is."
+
+
+def test_pasted_exam_without_answers():
+    content = """Question 1: Which explanation of the Daily Scrum is right?
+A. It is a status meeting
+B. It is for the Developers
+
+Question 2:
+What is the maximum length of a Sprint?
+
+A. One month
+B. Two months
+"""
+    questions = parse_questions_text(content)
+    assert [q["question"] for q in questions] == [
+        "Which explanation of the Daily Scrum is right? A. It is a status meeting",
+        "What is the maximum length of a Sprint?",
+    ]
+    assert questions[0]["options"] == ["B. It is for the Developers"]
+    assert questions[1]["options"] == ["A. One month", "B. Two months"]
+    assert all(q["answer"] == "" and q["explanation"] is None for q in questions)
+
+
+def test_bundled_bank_parses_every_block():
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "questions.txt")
+    with open(path, encoding="utf-8") as f:
+        blocks = f.read().count("Question ")
+    questions = parse_questions(path)
+    assert len(questions) == 549 <= blocks
+    assert all(q["question"] and q["options"] for q in questions)